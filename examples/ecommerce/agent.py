@@ -1,7 +1,11 @@
 from agents import Agent, RunContextWrapper, Runner, TResponseInputItem, function_tool, input_guardrail, GuardrailFunctionOutput
-from pydantic import BaseModel
+from functools import lru_cache
+from pydantic import BaseModel, ConfigDict
 from ecommerce.context import MyCustomAgentContext
 from ecommerce.llm import get_openai_chat_model
+from ecommerce import cache
+
+_ALLOWED_REGIONS = frozenset(("us", "eu", "asia"))
 
 
 @function_tool
@@ -28,7 +32,7 @@ async def update_customer_region(
 ) -> str:
     """Update the customer's region."""
     context = wrapper.context
-    if region not in ["us", "eu", "asia"]:
+    if region not in _ALLOWED_REGIONS:
         raise ValueError("Invalid region. Must be 'us', 'eu', or 'asia'.")
     
     context.update_region(region)
@@ -56,35 +60,81 @@ async def escalate_to_human(
 
 
 class EcommerceGuardrail(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     is_ecommerce_related: bool
     reasoning: str
 
-guardrail_agent = Agent(
-    name = "Guardrail Check",
-    instructions="Check if the question is related to e-commerce. If it is, return True and a reasoning. If not, return False.",
-    model=get_openai_chat_model(),
-    output_type=EcommerceGuardrail
-)
+@lru_cache(maxsize=None)
+def get_guardrail_agent() -> Agent:
+    """Build the guardrail agent on first use."""
+    return Agent(
+        name = "Guardrail Check",
+        instructions="Check if the question is related to e-commerce. If it is, return True and a reasoning. If not, return False.",
+        model=get_openai_chat_model(),
+        output_type=EcommerceGuardrail
+    )
+
+
+async def _guardrail_cached(
+    input: str | list[TResponseInputItem], context: MyCustomAgentContext
+) -> EcommerceGuardrail:
+    """Run the guardrail agent, reusing cached verdicts for the same user message.
+
+    Only the latest user message is checked against the caches, so earlier
+    turns in the history do not make every verdict unique.
+    """
+    message = cache.last_user_message(input)
+    if message is None:
+        result = await Runner.run(get_guardrail_agent(), input=input, context=context)
+        return result.final_output
+
+    key = cache.cache_key(cache.GUARDRAIL_CACHE_PREFIX, message)
+
+    if cache.redis_client is not None:
+        raw = await cache.redis_client.get(key)
+        if raw is not None:
+            return EcommerceGuardrail.model_validate_json(raw)
+
+    embedding = None
+    if cache.semantic_cache_enabled:
+        embedding = await cache.embed(message)
+        raw = await cache.semantic_lookup(cache.GUARDRAIL_NAMESPACE, embedding)
+        if raw is not None:
+            return EcommerceGuardrail.model_validate_json(raw)
+
+    result = await Runner.run(get_guardrail_agent(), input=input, context=context)
+    verdict = result.final_output
+    verdict_json = verdict.model_dump_json()
+
+    if cache.redis_client is not None:
+        await cache.redis_client.set(key, verdict_json, ex=cache.GUARDRAIL_CACHE_TTL)
+    if embedding is not None:
+        await cache.semantic_store(cache.GUARDRAIL_NAMESPACE, embedding, verdict_json)
+    return verdict
 
 
 @input_guardrail
 async def ecommerce_input_guardrail(
     ctx: RunContextWrapper[MyCustomAgentContext], agent: Agent, input: str | list[TResponseInputItem]
 ) -> GuardrailFunctionOutput:
-    
-    result = await Runner.run(guardrail_agent, input=input, context=ctx.context)
-    print(f"Guardrail check result: {result.final_output}")
+
+    verdict = await _guardrail_cached(input, ctx.context)
+    print(f"Guardrail check result: {verdict}")
     output = GuardrailFunctionOutput(
-        output_info=result.final_output, 
-        tripwire_triggered=not(result.final_output.is_ecommerce_related),
+        output_info=verdict,
+        tripwire_triggered=not(verdict.is_ecommerce_related),
     )
     print(f"Guardrail output: {output}")
     return output
 
-custom_agent = Agent[MyCustomAgentContext](
-    name="CustomerServiceAgent",
-    tools=[get_customer_info, add_customer_note, escalate_to_human, update_customer_region],
-    instructions="You are a customer service agent. Use the tools to help customers and escalate when needed.",
-    model=get_openai_chat_model(),
-    input_guardrails=[ecommerce_input_guardrail]
-)
\ No newline at end of file
+@lru_cache(maxsize=None)
+def get_custom_agent() -> Agent[MyCustomAgentContext]:
+    """Build the customer service agent on first use, keeping it out of worker startup."""
+    return Agent[MyCustomAgentContext](
+        name="CustomerServiceAgent",
+        tools=[get_customer_info, add_customer_note, escalate_to_human, update_customer_region],
+        instructions="You are a customer service agent. Use the tools to help customers and escalate when needed.",
+        model=get_openai_chat_model(),
+        input_guardrails=[ecommerce_input_guardrail]
+    )
\ No newline at end of file
@@ -1,14 +1,37 @@
 """
 Example showing how users can create their own context implementations
 using the generic ContextMiddleware.
+
+Run one worker per core behind gunicorn, e.g.:
+
+    gunicorn ecommerce.api:app -k uvicorn.workers.UvicornWorker -w $(nproc) \
+        --worker-connections 1000 --no-sendfile
 """
 
 from ecommerce.context import setup_custom_context_system, managed_context
-from ecommerce.agent import custom_agent
-from fastapi import FastAPI
+from ecommerce.agent import get_custom_agent
+from ecommerce import cache
+from ecommerce.limiter import acquire_slot, release_slot
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 from agents import InputGuardrailTripwireTriggered, Runner
-from agents_redis import RedisSession
+from agents_redis import RedisSessionManager
 from contextlib import asynccontextmanager
+import asyncio
+from typing import Literal
+import logging
+
+class SkipChatAccessLog(logging.Filter):
+    """Drop access log lines for the high-volume /chat endpoint."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # uvicorn access records carry (client, method, path, http_version, status)
+        args = record.args
+        return not (isinstance(args, tuple) and len(args) > 2 and str(args[2]).startswith("/chat"))
+
+
+logger = logging.getLogger(__name__)
+logging.getLogger("uvicorn.access").addFilter(SkipChatAccessLog())
 
 custom_context_middleware = None  # Will be set in startup
 redis_client = None  # Will be set in startup
@@ -17,45 +40,108 @@ redis_client = None  # Will be set in startup
 async def startup(app: FastAPI):
     global custom_context_middleware, redis_client
     custom_context_middleware, redis_client = await setup_custom_context_system()
-    yield
+    cache.redis_client = redis_client
+    cache.semantic_cache_enabled = await cache.create_semantic_index(redis_client)
+    # Conversation sessions share one connection pool across requests
+    app.state.session_manager = RedisSessionManager(
+        redis_url="redis://localhost:6379",
+        default_ttl=None,
+        max_connections=200,
+    )
+    try:
+        yield
+    finally:
+        await app.state.session_manager.close()
+
+app = FastAPI(lifespan=startup, default_response_class=ORJSONResponse)
+
 
-app = FastAPI(lifespan=startup)
+async def user_concurrency_slot(user_id: str):
+    """Reject the request with 429 while the user has too many chats in flight."""
+    request_id = await acquire_slot(redis_client, user_id)
+    if request_id is None:
+        raise HTTPException(status_code=429, detail="Too many concurrent requests")
+    try:
+        yield
+    finally:
+        await release_slot(redis_client, user_id, request_id)
 
 
-@app.post("/chat")
+@app.post("/chat", dependencies=[Depends(user_concurrency_slot)])
 async def custom_chat_endpoint(
     session_id: str,
     user_id: str,
     message: str,
-    customer_tier: str = "standard"
+    customer_tier: Literal["standard", "premium", "vip"] = "standard"
 ):
     """Chat endpoint using custom context."""
-    
-    # Use context manager with distributed lock for thread safety
-    async with managed_context(
-        custom_context_middleware,
-        redis_client,
-        session_id, 
-        user_id, 
-        message, 
-        customer_tier
-    ) as context:
-        
-        try:
-            # Run the custom agent with the provided message and context
-            result = await Runner.run(
-                starting_agent=custom_agent,
-                input=message,
-                context=context,
-                session=RedisSession(redis_url="redis://localhost:6379", session_id=session_id),
-            )
-        except InputGuardrailTripwireTriggered as e:
-            return {
-                "error": str(e),
-                "context_summary": context.get_context_summary(),
-                "escalation_needed": context.escalation_needed
-            }
-    
+
+    # VIP customers always get a live model response. For everyone else, embed
+    # the message for the semantic cache while the session lock is acquired
+    embedding_task = None
+    if customer_tier != "vip" and cache.semantic_cache_enabled:
+        embedding_task = asyncio.create_task(cache.embed(message))
+
+    try:
+        # Use context manager with distributed lock for thread safety
+        async with managed_context(
+            custom_context_middleware,
+            redis_client,
+            session_id, 
+            user_id, 
+            message, 
+            customer_tier
+        ) as context:
+
+            session = app.state.session_manager.get_session(session_id)
+            namespace = cache.chat_namespace(customer_tier, user_id)
+
+            embedding = None
+            cached_response = None
+            # Later turns refer back to the history, so a reply to the same
+            # words can be wrong for them; only first-turn replies are cached
+            if embedding_task is not None and await session.get_session_size() == 0:
+                try:
+                    embedding = await embedding_task
+                    cached_response = await cache.semantic_lookup(namespace, embedding)
+                except Exception:
+                    # The cache is an optimization: treat its failures as a miss
+                    logger.warning("Semantic cache lookup failed", exc_info=True)
+                    embedding = None
+
+            if cached_response is not None:
+                # Keep the conversation history complete even though the agent didn't run
+                await session.add_items([
+                    {"role": "user", "content": message},
+                    {"role": "assistant", "content": cached_response},
+                ])
+                return {
+                    "response": cached_response,
+                    "context_summary": context.get_context_summary(),
+                    "escalation_needed": context.escalation_needed
+                }
+
+            try:
+                # Run the custom agent with the provided message and context
+                result = await Runner.run(
+                    starting_agent=get_custom_agent(),
+                    input=message,
+                    context=context,
+                    session=session,
+                )
+            except InputGuardrailTripwireTriggered as e:
+                return {
+                    "error": str(e),
+                    "context_summary": context.get_context_summary(),
+                    "escalation_needed": context.escalation_needed
+                }
+
+            if embedding is not None:
+                await cache.semantic_store(namespace, embedding, str(result.final_output))
+    finally:
+        if embedding_task is not None and not embedding_task.done():
+            embedding_task.cancel()
+
     return {
         "response": result.final_output,
         "context_summary": context.get_context_summary(),
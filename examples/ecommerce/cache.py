@@ -0,0 +1,154 @@
+"""
+Redis-backed response caches for the ecommerce example agents.
+
+Two tiers are provided:
+1. An exact-key cache keyed by a normalized hash of the agent input
+2. A semantic cache backed by a RediSearch vector index, so reworded
+   variants of the same question can reuse a stored response
+"""
+
+import hashlib
+import json
+import uuid
+from array import array
+from typing import Any
+
+import redis.asyncio as redis
+from redis.commands.search.field import TagField, TextField, VectorField
+from redis.commands.search.index_definition import IndexDefinition, IndexType
+from redis.commands.search.query import Query
+
+from ecommerce.llm import get_embedding
+
+redis_client: redis.Redis | None = None  # Will be set in startup
+semantic_cache_enabled = False  # Will be set in startup
+
+GUARDRAIL_CACHE_PREFIX = "grd"
+GUARDRAIL_CACHE_TTL = 86400  # 24 hours
+
+SEMANTIC_INDEX = "sem_cache"
+SEMANTIC_PREFIX = "sc:"
+SEMANTIC_DIM = 1536
+SEMANTIC_MAX_DISTANCE = 0.05  # Cosine similarity > 0.95
+SEMANTIC_CACHE_TTL = 7200  # 2 hours
+GUARDRAIL_NAMESPACE = "guardrail"
+CHAT_NAMESPACE = "chat"
+
+_EMBEDDING_CACHE_SIZE = 1024
+_embeddings: dict[str, list[float]] = {}
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip and collapse whitespace so trivially different inputs share a key."""
+    return " ".join(text.lower().split())
+
+
+def cache_key(prefix: str, input: str | list[Any]) -> str:
+    """Build an exact-match cache key from a normalized hash of the agent input."""
+    if not isinstance(input, str):
+        input = json.dumps(input, sort_keys=True)
+    digest = hashlib.blake2b(normalize(input).encode(), digest_size=16).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+def last_user_message(input: str | list[Any]) -> str | None:
+    """Return the text of the most recent user message in an agent input."""
+    if isinstance(input, str):
+        return input
+    for item in reversed(input):
+        if isinstance(item, dict) and item.get("role") == "user":
+            content = item.get("content")
+            if isinstance(content, str):
+                return content
+            # Content parts, e.g. [{"type": "input_text", "text": "..."}]
+            return " ".join(
+                part["text"] for part in content or () if isinstance(part, dict) and "text" in part
+            )
+    return None
+
+
+def chat_namespace(customer_tier: str, user_id: str) -> str:
+    """Semantic cache namespace for chat replies, scoped to one user and tier.
+
+    Replies can contain account details from tool calls, so they are never
+    shared across users. The user ID is hashed to keep the tag query free of
+    characters that would need escaping.
+    """
+    digest = hashlib.blake2b(user_id.encode(), digest_size=16).hexdigest()
+    return f"{CHAT_NAMESPACE}_{customer_tier}_{digest}"
+
+
+async def create_semantic_index(client: redis.Redis) -> bool:
+    """Create the vector index used by the semantic cache.
+
+    Returns:
+        True if the index is available, False if the server lacks RediSearch
+    """
+    schema = (
+        TagField("ns"),
+        VectorField(
+            "emb",
+            "HNSW",
+            {"TYPE": "FLOAT32", "DIM": SEMANTIC_DIM, "DISTANCE_METRIC": "COSINE"},
+        ),
+        TextField("response"),
+    )
+    definition = IndexDefinition(prefix=[SEMANTIC_PREFIX], index_type=IndexType.HASH)
+
+    try:
+        await client.ft(SEMANTIC_INDEX).create_index(schema, definition=definition)
+    except redis.ResponseError as e:
+        if "Index already exists" in str(e):
+            return True
+        return False
+    return True
+
+
+async def embed(text: str) -> list[float]:
+    """Embed text once per process, keyed by its normalized form."""
+    key = normalize(text)
+    embedding = _embeddings.get(key)
+    if embedding is None:
+        embedding = await get_embedding(text)
+        if len(_embeddings) >= _EMBEDDING_CACHE_SIZE:
+            _embeddings.pop(next(iter(_embeddings)))
+        _embeddings[key] = embedding
+    return embedding
+
+
+async def semantic_lookup(namespace: str, embedding: list[float]) -> str | None:
+    """Return the stored response closest to the embedding, if similar enough."""
+    if redis_client is None or not semantic_cache_enabled:
+        return None
+
+    query = (
+        Query(f"(@ns:{{{namespace}}})=>[KNN 1 @emb $v AS score]")
+        .return_fields("response", "score")
+        .dialect(2)
+    )
+    result = await redis_client.ft(SEMANTIC_INDEX).search(
+        query, query_params={"v": array("f", embedding).tobytes()}
+    )
+
+    if result.docs and float(result.docs[0].score) < SEMANTIC_MAX_DISTANCE:
+        return result.docs[0].response
+    return None
+
+
+async def semantic_store(namespace: str, embedding: list[float], response: str) -> None:
+    """Store a response under its embedding for later similarity lookups."""
+    if redis_client is None or not semantic_cache_enabled:
+        return
+
+    key = f"{SEMANTIC_PREFIX}{uuid.uuid4().hex}"
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hset(
+            key,
+            mapping={
+                "ns": namespace,
+                "emb": array("f", embedding).tobytes(),
+                "response": response,
+            },
+        )
+        pipe.expire(key, SEMANTIC_CACHE_TTL)
+        await pipe.execute()
@@ -1,17 +1,73 @@
-from typing import Optional, List, Dict, Any, Literal
-from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Literal, ClassVar
+from pydantic import BaseModel, Field, PrivateAttr
 from datetime import datetime
+import time
 from agents_redis.context import DistributedContextManager, ContextMiddleware
 from contextlib import asynccontextmanager
-from agents import Runner
-from agents_redis import RedisSession
 import asyncio
+import random
+import secrets
 import redis.asyncio as redis
 
+# Only delete the lock if it still holds our token, so a request whose
+# lock already expired can never release a lock now owned by another one
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_release_lock_script = None  # Registered in setup_custom_context_system
+
+
+def get_release_lock_script(redis_client: redis.Redis):
+    """Register the lock release script once and reuse its SHA afterwards."""
+    global _release_lock_script
+    if _release_lock_script is None:
+        _release_lock_script = redis_client.register_script(RELEASE_LOCK_SCRIPT)
+    return _release_lock_script
+
+
+def _now_ms() -> int:
+    """Current time as integer epoch milliseconds."""
+    return time.time_ns() // 1_000_000
+
+
+# Last formatted note timestamp, reused for notes added within the same millisecond
+_note_ts_ms = 0
+_note_ts_str = ""
+
+
+def _note_timestamp(now_ms: int) -> str:
+    """ISO timestamp for agent notes, formatted at most once per millisecond."""
+    global _note_ts_ms, _note_ts_str
+    if now_ms != _note_ts_ms:
+        _note_ts_ms = now_ms
+        _note_ts_str = datetime.fromtimestamp(now_ms / 1000).isoformat()
+    return _note_ts_str
+
+
+# Fields returned by MyCustomAgentContext.get_context_summary
+_SUMMARY_FIELDS = frozenset(
+    (
+        "user_id",
+        "session_id",
+        "customer_tier",
+        "current_inquiry",
+        "region",
+        "escalation_needed",
+        "last_updated_ms",
+    )
+)
+
 
 # Custom context implementation
 class MyCustomAgentContext(BaseModel):
     """Custom context implementation with different fields."""
+
+    # Only the most recent notes are kept so the stored context stays small
+    MAX_NOTES: ClassVar[int] = 50
     
     # Required fields
     user_id: str
@@ -20,65 +76,79 @@ class MyCustomAgentContext(BaseModel):
     # Custom business logic fields
     customer_tier: Literal["standard", "premium", "vip"] = "standard"
     product_interest: Optional[str] = None
-    region: Literal["us", "eu", "asia"] = ""
+    region: Literal["us", "eu", "asia"] = "us"
     
     # Custom memory contexts
     current_inquiry: Optional[str] = None
     agent_notes: List[str] = Field(default_factory=list)
     escalation_needed: bool = False
     
-    # Metadata
-    created_at: float = Field(default_factory=lambda: datetime.now().timestamp())
-    last_updated: float = Field(default_factory=lambda: datetime.now().timestamp())
+    # Metadata, as epoch milliseconds
+    created_at_ms: int = Field(default_factory=_now_ms)
+    last_updated_ms: int = Field(default_factory=_now_ms)
+
+    # Fields changed since the context was loaded, so unchanged turns skip the write
+    _dirty: set[str] = PrivateAttr(default_factory=set)
     
     
     def update_region(self, region: Literal["us", "eu", "asia"]) -> None:
         """Update region."""
         self.region = region
+        self._dirty.add("region")
         self._update_timestamp()
 
         
     def update_inquiry(self, inquiry: str) -> None:
-        """Update current inquiry."""
+        """Update current inquiry.
+
+        The inquiry is rewritten at the start of every turn, so on its own it
+        does not mark the context dirty.
+        """
         self.current_inquiry = inquiry
         self._update_timestamp()
     
     def add_agent_note(self, note: str) -> None:
         """Add an agent note."""
-        timestamped_note = f"[{datetime.now().isoformat()}] {note}"
+        now_ms = _now_ms()
+        timestamped_note = f"[{_note_timestamp(now_ms)}] {note}"
         self.agent_notes.append(timestamped_note)
-        self._update_timestamp()
+        if len(self.agent_notes) > self.MAX_NOTES:
+            del self.agent_notes[:-self.MAX_NOTES]
+        self._dirty.add("agent_notes")
+        self.last_updated_ms = now_ms
     
     def request_escalation(self, reason: str) -> None:
         """Request escalation with reason."""
         self.escalation_needed = True
+        self._dirty.add("escalation_needed")
         self.add_agent_note(f"ESCALATION REQUESTED: {reason}")
     
+    @property
+    def is_dirty(self) -> bool:
+        """Whether any persistent field changed since the context was loaded."""
+        return bool(self._dirty)
+    
     def _update_timestamp(self) -> None:
         """Update last modified timestamp."""
-        self.last_updated = datetime.now().timestamp()
+        self.last_updated_ms = _now_ms()
     
     def get_context_summary(self) -> Dict[str, Any]:
         """Get summary of context for API responses."""
-        return {
-            "user_id": self.user_id,
-            "session_id": self.session_id,
-            "customer_tier": self.customer_tier,
-            "current_inquiry": self.current_inquiry,
-            "region": self.region,
-            "agent_notes_count": len(self.agent_notes),
-            "escalation_needed": self.escalation_needed,
-            "last_updated": datetime.fromtimestamp(self.last_updated).isoformat(),
-        }
+        summary = self.model_dump(mode="json", include=_SUMMARY_FIELDS)
+        summary["agent_notes_count"] = len(self.agent_notes)
+        return summary
     
 # Custom context factory function
 def create_custom_context(
     session_id: str, 
     user_id: str, 
-    customer_tier: str = "standard"
+    customer_tier: Literal["standard", "premium", "vip"] = "standard"
 ) -> MyCustomAgentContext:
-    """Factory function to create custom context with defaults."""
-    return MyCustomAgentContext(
+    """Factory function to create custom context with defaults.
+
+    Inputs are already validated by the FastAPI layer, so validation is skipped.
+    """
+    return MyCustomAgentContext.model_construct(
         session_id=session_id,
         user_id=user_id,
         customer_tier=customer_tier
@@ -88,19 +158,23 @@ def create_custom_context(
 async def setup_custom_context_system():
     """Example of setting up the context system with custom context type."""
     
-    # Create Redis client
-    redis_client = redis.from_url("redis://localhost:6379", decode_responses=True)
+    # Create Redis client (raw bytes, contexts are stored as MessagePack)
+    redis_client = redis.from_url("redis://localhost:6379")
     
     # Create context manager with your custom type
     context_manager = DistributedContextManager[MyCustomAgentContext](
         redis_client=redis_client,
         context_class=MyCustomAgentContext,
         key_prefix="custom_agent_context",
-        default_ttl=7200  # 2 hours
+        default_ttl=7200,  # 2 hours
+        serializer="msgpack",
     )
     
     # Create generic middleware with your custom type
     context_middleware = ContextMiddleware[MyCustomAgentContext](context_manager)
+
+    # Register the lock release script up front so requests only send EVALSHA
+    get_release_lock_script(redis_client)
     
     # Return both middleware and redis client for locking
     return context_middleware, redis_client
@@ -115,7 +189,8 @@ async def managed_context(
     user_id: str,
     message: str,
     customer_tier: str = "standard",
-    lock_timeout: int = 30
+    lock_timeout: int = 30,
+    lock_retries: int = 8
 ):
     """
     Context manager with distributed lock to prevent concurrent modifications
@@ -126,30 +201,35 @@ async def managed_context(
             middleware, redis_client, session_id, user_id, message, customer_tier
         ) as context:
             result = await Runner.run(
-                starting_agent=custom_agent,
+                starting_agent=get_custom_agent(),
                 input=message,
                 context=context,
-                session=RedisSession(redis_url="redis://localhost:6379", session_id=session_id),
+                session=session_manager.get_session(session_id),
             )
             # context is automatically saved after the block
     """
     lock_key = f"session_lock:{session_id}"
+    context_key = middleware.context_key(session_id)
+    lock_token = secrets.token_hex(16)
+    lock_timeout_ms = lock_timeout * 1000
+    release_lock = get_release_lock_script(redis_client)
     lock_acquired = False
+
+    async def acquire_lock_and_fetch():
+        # Try to take the lock and read the current context in one round trip
+        async with redis_client.pipeline(transaction=False) as pipe:
+            await pipe.set(lock_key, lock_token, nx=True, px=lock_timeout_ms)
+            await pipe.get(context_key)
+            return await pipe.execute()
     
     try:
-        # Try to acquire lock with timeout
-        lock_acquired = await redis_client.set(
-            lock_key, "1", nx=True, ex=lock_timeout
-        )
+        lock_acquired, raw_context = await acquire_lock_and_fetch()
         
         if not lock_acquired:
-            # Wait and retry with backoff
-            retries = 5
-            for i in range(retries):
-                await asyncio.sleep(0.5 * (i + 1))
-                lock_acquired = await redis_client.set(
-                    lock_key, "1", nx=True, ex=lock_timeout
-                )
+            # Wait and retry with exponential backoff and jitter
+            for i in range(lock_retries):
+                await asyncio.sleep(min(0.05 * 2**i, 1.0) * random.uniform(0.5, 1.5))
+                lock_acquired, raw_context = await acquire_lock_and_fetch()
                 if lock_acquired:
                     break
             
@@ -157,19 +237,32 @@ async def managed_context(
                 raise Exception(f"Could not acquire lock for session {session_id}")
         
         # Now proceed with context management
-        default_context = create_custom_context(session_id, user_id, customer_tier)
-        context = await middleware.get_or_create_context(session_id, default_context)
+        context = None
+        if raw_context is not None:
+            context = middleware.deserialize(raw_context)
+        is_new = context is None
+        if is_new:
+            context = create_custom_context(session_id, user_id, customer_tier)
         context.update_inquiry(message)
         
         yield context
         
-        # Save updated context
-        await middleware.save_context(session_id, context)
+        # Save the context only if it is new or changed (otherwise just refresh
+        # its TTL) and release the lock in one round trip
+        ttl = middleware.context_manager.default_ttl
+        async with redis_client.pipeline(transaction=False) as pipe:
+            if is_new or context.is_dirty:
+                await pipe.set(context_key, middleware.serialize(context), ex=ttl)
+            else:
+                await pipe.expire(context_key, ttl)
+            await release_lock(keys=[lock_key], args=[lock_token], client=pipe)
+            await pipe.execute()
+        lock_acquired = False
         
     finally:
-        # Release lock if we acquired it
+        # Release lock only if we still own it
         if lock_acquired:
-            await redis_client.delete(lock_key)
+            await release_lock(keys=[lock_key], args=[lock_token], client=redis_client)
 
 
 # Optional: Unsafe context manager without locking (use only if you're certain of no concurrency)
@@ -187,11 +280,15 @@ async def managed_context_no_lock(
     
     WARNING: This can lead to race conditions with multiple agents or concurrent requests!
     """
-    # Create default context for this customer
-    default_context = create_custom_context(session_id, user_id, customer_tier)
-    
-    # Get or create context using generic middleware
-    context = await middleware.get_or_create_context(session_id, default_context)
+    # Read the stored context directly; a missing one means a new session,
+    # so build the default without going through the middleware's get path
+    raw_context = await middleware.get_raw(session_id)
+    context = None
+    if raw_context is not None:
+        context = middleware.deserialize(raw_context)
+    is_new = context is None
+    if is_new:
+        context = create_custom_context(session_id, user_id, customer_tier)
     
     # Update current inquiry
     context.update_inquiry(message)
@@ -199,5 +296,8 @@ async def managed_context_no_lock(
     try:
         yield context
     finally:
-        # Save updated context
-        await middleware.save_context(session_id, context)
\ No newline at end of file
+        # Save new or changed contexts, otherwise just refresh the TTL
+        if is_new or context.is_dirty:
+            await middleware.save_context(session_id, context)
+        else:
+            await middleware.context_manager.extend_ttl(session_id)
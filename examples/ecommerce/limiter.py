@@ -0,0 +1,72 @@
+"""
+Per-user concurrent request limiter backed by a Redis sorted set.
+
+Each in-flight request is a member scored by its start time. Admission,
+stale entry cleanup and the limit check happen atomically in one Lua
+script, so overload is rejected in a single round trip instead of
+queueing behind the session lock.
+"""
+
+import time
+import uuid
+import redis.asyncio as redis
+
+# Drop requests older than the window (crashed workers), then admit the
+# new request only while the user is under the concurrency limit
+ACQUIRE_SLOT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[2]))
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_acquire_slot_script = None  # Registered on first use
+
+
+def get_acquire_slot_script(redis_client: redis.Redis):
+    """Register the admission script once and reuse its SHA afterwards."""
+    global _acquire_slot_script
+    if _acquire_slot_script is None:
+        _acquire_slot_script = redis_client.register_script(ACQUIRE_SLOT_SCRIPT)
+    return _acquire_slot_script
+
+
+def _slots_key(user_id: str) -> str:
+    return f"concurrency:{user_id}"
+
+
+async def acquire_slot(
+    redis_client: redis.Redis,
+    user_id: str,
+    max_concurrent: int = 5,
+    window_ms: int = 60_000,
+) -> str | None:
+    """
+    Try to admit a request for a user.
+
+    Args:
+        redis_client: Redis client
+        user_id: User the request belongs to
+        max_concurrent: Maximum requests in flight per user
+        window_ms: Age after which an unreleased slot is considered stale
+
+    Returns:
+        The slot's request ID to release later, or None if the user is at the limit
+    """
+    request_id = uuid.uuid4().hex
+    acquire = get_acquire_slot_script(redis_client)
+
+    admitted = await acquire(
+        keys=[_slots_key(user_id)],
+        args=[int(time.time() * 1000), window_ms, max_concurrent, request_id],
+        client=redis_client,
+    )
+    return request_id if admitted else None
+
+
+async def release_slot(redis_client: redis.Redis, user_id: str, request_id: str) -> None:
+    """Release a slot obtained from acquire_slot."""
+    await redis_client.zrem(_slots_key(user_id), request_id)
@@ -1,28 +1,47 @@
-from openai import AsyncAzureOpenAI
-from agents.models.openai_chatcompletions import OpenAIChatCompletionsModel
+from functools import lru_cache
+import httpx
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_azure_openai_client():
-    """Initialize Azure OpenAI client with DefaultAzureCredential."""
+@lru_cache(maxsize=None)
+def get_azure_openai_client(azure_deployment: str | None = None):
+    """Initialize Azure OpenAI client with DefaultAzureCredential.
+
+    Clients are cached per deployment so every agent shares one HTTP
+    connection pool to Azure.
+    """
+    from openai import AsyncAzureOpenAI
 
     azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-    azure_deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")
+    azure_deployment = azure_deployment or os.getenv("AZURE_OPENAI_DEPLOYMENT")
     azure_api_key = os.getenv("AZURE_OPENAI_API_KEY")
 
     return AsyncAzureOpenAI(
         azure_endpoint=azure_endpoint,
         azure_deployment=azure_deployment,
         api_key=azure_api_key,
-        api_version="2024-12-01-preview"
+        api_version="2024-12-01-preview",
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        ),
     )
 
+@lru_cache(maxsize=None)
 def get_openai_chat_model():
     """Get OpenAI chat model with Azure OpenAI client."""
+    from agents.models.openai_chatcompletions import OpenAIChatCompletionsModel
+
     client = get_azure_openai_client()
     return OpenAIChatCompletionsModel(
         openai_client=client,
         model="gpt-35-turbo"
-    )
\ No newline at end of file
+    )
+
+async def get_embedding(text: str) -> list[float]:
+    """Embed text with the Azure OpenAI embeddings deployment."""
+    deployment = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "text-embedding-ada-002")
+    client = get_azure_openai_client(azure_deployment=deployment)
+    response = await client.embeddings.create(model=deployment, input=text)
+    return response.data[0].embedding
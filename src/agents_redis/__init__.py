@@ -7,13 +7,15 @@ This package provides:
 3. UnifiedSessionManager (combines both for easy usage)
 """
 
-from .session import RedisSession, RedisSessionManager
+from .session import RedisSession, RedisSessionManager, RedisStreamSession
  
 from .context import (
     DistributedContextManager,
     ContextMiddleware
 )
 
+from .models import AgentMemoryContext
+
 from .integration import (
     UnifiedSessionManager,
     AgentSessionWrapper,
@@ -23,6 +25,7 @@ from .integration import (
 __all__ = [
     "RedisSession",
     "RedisSessionManager",
+    "RedisStreamSession",
     "DistributedContextManager", 
     "ContextMiddleware",
     "AgentMemoryContext",
@@ -0,0 +1,40 @@
+"""Internal Redis helpers shared by the session and context modules."""
+
+from __future__ import annotations
+
+try:
+    import redis.asyncio as redis
+    from redis.exceptions import NoScriptError
+except ImportError:
+    raise ImportError("redis package is required")
+
+# Frame magic number that prefixes every zstd-compressed payload
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def is_unknown_command(error: redis.ResponseError) -> bool:
+    """Whether the server rejected a command it doesn't support or has disabled."""
+    return "unknown command" in str(error).lower()
+
+
+def is_script_unavailable(error: redis.ResponseError) -> bool:
+    """Whether a script call failed because scripting is unavailable, not inside the script."""
+    return isinstance(error, NoScriptError) or is_unknown_command(error)
+
+
+async def safe_delete(client: redis.Redis, *keys: str) -> int:
+    """Delete keys with UNLINK, falling back to DEL where UNLINK is disabled.
+
+    UNLINK frees the memory of large values in a background thread instead of
+    blocking the server. Every supported server (Redis 6.2+) has it, but it can
+    be removed with rename-command.
+
+    Returns:
+        Number of keys that were removed
+    """
+    try:
+        return await client.unlink(*keys)
+    except redis.ResponseError as e:
+        if not is_unknown_command(e):
+            raise
+        return await client.delete(*keys)
@@ -8,16 +8,38 @@ framework's RunContextWrapper pattern.
 
 from __future__ import annotations
 
-from typing import TypeVar, Generic, Optional, Dict, Any, Type, List
+import asyncio
+import functools
+import logging
+from typing import TypeVar, Generic, Optional, Dict, Any, Type, List, Literal, Callable
 
 try:
+    import orjson
     import redis.asyncio as redis
     from pydantic import BaseModel
 except ImportError:
-    raise ImportError("redis and pydantic packages are required")
+    raise ImportError("redis, orjson and pydantic packages are required")
+
+from ._utils import ZSTD_MAGIC, is_script_unavailable, safe_delete
 
 T = TypeVar('T', bound=BaseModel)
 
+logger = logging.getLogger(__name__)
+
+# Maximum number of session keys memoized per DistributedContextManager
+KEY_CACHE_SIZE = 10_000
+
+# Return the stored value and refresh its TTL, or store the default when missing
+GET_OR_SET_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return value
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return false
+"""
+
 class DistributedContextManager(Generic[T]):
     """
     Redis-backed context manager that persists RunContextWrapper context
@@ -29,38 +51,182 @@ class DistributedContextManager(Generic[T]):
         redis_client: redis.Redis, 
         context_class: Type[T],
         key_prefix: str = "agent_context",
-        default_ttl: int = 3600  # 1 hour default
+        default_ttl: int = 3600,  # 1 hour default
+        serializer: Literal["json", "msgpack"] = "json",
+        trust_stored_data: bool = False,
+        compress_threshold: Optional[int] = None,
     ):
+        """
+        Args:
+            trust_stored_data: Rebuild stored contexts with model_construct,
+                skipping validation. Only safe when every writer uses the
+                same context class; nested models are left as plain dicts.
+            compress_threshold: Compress payloads larger than this many bytes
+                with zstd. Requires a client without decode_responses.
+                Compressed payloads are always readable, whatever this is set to.
+        """
         self.redis = redis_client
         self.context_class = context_class
         self.key_prefix = key_prefix
         self.default_ttl = default_ttl
+        self.serializer = serializer
+        self.trust_stored_data = trust_stored_data
+        self._key_prefix_colon = f"{key_prefix}:"
+        self._key_cache: Dict[str, str] = {}
+        # Latest in-flight write per key; each write waits for the one before it
+        self._pending_writes: Dict[str, asyncio.Task] = {}
+        self._get_or_set_script = redis_client.register_script(GET_OR_SET_SCRIPT)
+
+        # Bind the prebuilt pydantic-core validator and serializer once instead
+        # of resolving them through model_validate_json/model_dump_json per call
+        self._validate_json = context_class.__pydantic_validator__.validate_json
+        self._dump_json = context_class.__pydantic_serializer__.to_json
+
+        if serializer == "msgpack":
+            # Binary payloads require a client created without decode_responses
+            try:
+                import msgpack
+            except ImportError:
+                raise ImportError("msgpack package is required for the msgpack serializer")
+            self._packb = msgpack.packb
+            self._unpackb = msgpack.unpackb
+            self._validate_python = context_class.__pydantic_validator__.validate_python
+            self._dump_python = context_class.__pydantic_serializer__.to_python
+
+        self.compress_threshold = compress_threshold
+        self._compress = None
+        self._decompress = None
+        if compress_threshold is not None:
+            self._load_zstd()
+    
+    def _load_zstd(self) -> None:
+        """Create the zstd compressor and decompressor."""
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard package is required for context compression")
+        self._compress = zstandard.ZstdCompressor(level=3).compress
+        self._decompress = zstandard.ZstdDecompressor().decompress
+        self._zstd_error = zstandard.ZstdError
     
     def _get_key(self, session_id: str) -> str:
-        """Generate Redis key for session context."""
-        return f"{self.key_prefix}:{session_id}"
+        """Generate Redis key for session context, memoized per session ID."""
+        key = self._key_cache.get(session_id)
+        if key is None:
+            if len(self._key_cache) >= KEY_CACHE_SIZE:
+                # Evict the oldest entry (dicts preserve insertion order)
+                del self._key_cache[next(iter(self._key_cache))]
+            key = self._key_prefix_colon + session_id
+            self._key_cache[session_id] = key
+        return key
+    
+    def _serialize_context(self, context: T) -> bytes:
+        """Serialize context object to JSON or MessagePack bytes, compressing large payloads."""
+        if self.serializer == "msgpack":
+            payload = self._packb(self._dump_python(context, mode="json"), use_bin_type=True)
+        else:
+            payload = self._dump_json(context)
+        if self.compress_threshold is not None and len(payload) > self.compress_threshold:
+            payload = self._compress(payload)
+        return payload
     
-    def _serialize_context(self, context: T) -> str:
-        """Serialize context object to JSON string."""
-        return context.model_dump_json()
+    def _deserialize_context(self, context_json: str | bytes) -> T:
+        """Deserialize JSON or MessagePack payload back to context object."""
+        if isinstance(context_json, bytes) and context_json.startswith(ZSTD_MAGIC):
+            if self._decompress is None:
+                self._load_zstd()
+            try:
+                context_json = self._decompress(context_json)
+            except self._zstd_error as exc:
+                raise ValueError("Corrupt zstd-compressed context") from exc
+        if self.serializer == "msgpack":
+            data = self._unpackb(context_json, raw=False)
+            if self.trust_stored_data and isinstance(data, dict):
+                return self.context_class.model_construct(**data)
+            return self._validate_python(data)
+        if self.trust_stored_data:
+            data = orjson.loads(context_json)
+            if isinstance(data, dict):
+                return self.context_class.model_construct(**data)
+        return self._validate_json(context_json)
     
-    def _deserialize_context(self, context_json: str) -> T:
-        """Deserialize JSON string back to context object."""
-        return self.context_class.model_validate_json(context_json)
+    async def _get_or_set(
+        self, key: str, make_payload: Callable[[], bytes], ttl: int
+    ) -> Optional[str | bytes]:
+        """
+        Get a stored payload and refresh its TTL, or store make_payload() if
+        missing. Returns None when the payload was stored.
+        
+        Hits take one GETEX round trip and never build the payload; misses
+        store it atomically with a script.
+        """
+        value = await self.redis.getex(key, ex=ttl)
+        if value is not None:
+            return value
+        
+        payload = make_payload()
+        try:
+            return await self._get_or_set_script(keys=[key], args=[payload, ttl])
+        except redis.ResponseError as e:
+            if not is_script_unavailable(e):
+                raise
+            # Scripting unavailable (e.g. EVAL disabled); NX keeps a context
+            # stored concurrently by another worker
+            if await self.redis.set(key, payload, ex=ttl, nx=True):
+                return None
+            return await self.redis.get(key)
     
     async def store_context(
         self, 
         session_id: str, 
         context: T, 
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        background: bool = False
     ) -> None:
-        """Store context in Redis with optional TTL."""
+        """
+        Store context in Redis with optional TTL.
+        
+        With background=True the write is scheduled as a task and this returns
+        without waiting for Redis. A read issued right after may still see the
+        previous context; call flush_pending_writes() before shutting down.
+        Failed background writes are logged. Successive writes to the same
+        session are applied in the order they were issued, background or not.
+        """
         key = self._get_key(session_id)
         context_json = self._serialize_context(context)
         
         # Store with TTL
         ttl = ttl or self.default_ttl
-        await self.redis.setex(key, ttl, context_json)
+        # Every write is registered, so a background write issued while a
+        # foreground one is in flight still lands after it
+        previous = self._pending_writes.get(key)
+        task = asyncio.create_task(self._write_after(previous, key, ttl, context_json))
+        self._pending_writes[key] = task
+        task.add_done_callback(functools.partial(self._write_done, key, background))
+        if not background:
+            await task
+    
+    async def _write_after(
+        self, previous: Optional[asyncio.Task], key: str, ttl: int, payload: bytes
+    ) -> None:
+        """Store a payload once the previous write to the same key has finished."""
+        if previous is not None:
+            # Its outcome is handled by its own done callback
+            await asyncio.wait([previous])
+        await self.redis.setex(key, ttl, payload)
+    
+    def _write_done(self, key: str, background: bool, task: asyncio.Task) -> None:
+        """Forget a finished write and log it if it failed unobserved."""
+        if self._pending_writes.get(key) is task:
+            del self._pending_writes[key]
+        if background and not task.cancelled() and task.exception() is not None:
+            logger.error("Background context write to %s failed", key, exc_info=task.exception())
+    
+    async def flush_pending_writes(self) -> None:
+        """Wait for all background writes to finish."""
+        if self._pending_writes:
+            # Each pending task waits for the earlier writes to its key
+            await asyncio.gather(*self._pending_writes.values(), return_exceptions=True)
     
     async def get_context(self, session_id: str) -> Optional[T]:
         """Retrieve context from Redis."""
@@ -75,6 +241,29 @@ class DistributedContextManager(Generic[T]):
         except Exception:
             return None
     
+    async def get_contexts(
+        self, 
+        session_ids: List[str], 
+        batch_size: int = 1000
+    ) -> Dict[str, Optional[T]]:
+        """Retrieve several contexts with one MGET per batch of keys."""
+        contexts: Dict[str, Optional[T]] = {}
+        
+        for start in range(0, len(session_ids), batch_size):
+            batch = session_ids[start:start + batch_size]
+            raw_contexts = await self.redis.mget([self._get_key(session_id) for session_id in batch])
+            
+            for session_id, context_json in zip(batch, raw_contexts):
+                context = None
+                if context_json is not None:
+                    try:
+                        context = self._deserialize_context(context_json)
+                    except Exception:
+                        pass
+                contexts[session_id] = context
+        
+        return contexts
+    
     async def update_context(
         self, 
         session_id: str, 
@@ -111,7 +300,7 @@ class DistributedContextManager(Generic[T]):
     async def delete_context(self, session_id: str) -> bool:
         """Delete context from Redis."""
         key = self._get_key(session_id)
-        return bool(await self.redis.delete(key))
+        return bool(await safe_delete(self.redis, key))
     
     async def extend_ttl(self, session_id: str, ttl: Optional[int] = None) -> bool:
         """Extend TTL for a context."""
@@ -119,23 +308,44 @@ class DistributedContextManager(Generic[T]):
         ttl = ttl or self.default_ttl
         return bool(await self.redis.expire(key, ttl))
     
-    async def get_all_sessions(self) -> List[str]:
-        """Get all active session IDs."""
-        pattern = f"{self.key_prefix}:*"
-        keys = await self.redis.keys(pattern)
-        prefix_len = len(self.key_prefix) + 1
-        return [key[prefix_len:] for key in keys]
+    async def get_all_sessions(self, count: int = 1000) -> List[str]:
+        """Get all active session IDs, using SCAN so the server is never blocked."""
+        prefix = self._key_prefix_colon
+        pattern = prefix + "*"
+        sessions = {}  # SCAN may return a key more than once
+        if self.redis.get_encoder().decode_responses:
+            async for key in self.redis.scan_iter(match=pattern, count=count):
+                sessions[key.removeprefix(prefix)] = None
+        else:
+            # Keys come back as bytes; session IDs are always returned as str
+            byte_prefix = prefix.encode()
+            async for key in self.redis.scan_iter(match=pattern, count=count):
+                sessions[key.removeprefix(byte_prefix).decode()] = None
+        return list(sessions)
     
-    async def cleanup_expired_contexts(self) -> int:
+    async def cleanup_expired_contexts(self, count: int = 1000, batch_size: int = 500) -> int:
         """Clean up expired contexts. Returns count of cleaned contexts."""
-        pattern = f"{self.key_prefix}:*"
-        keys = await self.redis.keys(pattern)
+        pattern = self._key_prefix_colon + "*"
         
         expired_count = 0
-        for key in keys:
-            ttl = await self.redis.ttl(key)
-            if ttl == -2:  # Key doesn't exist (expired)
-                expired_count += 1
+        batch = []
+        
+        async def count_expired(keys: List[str]) -> int:
+            # Probe TTLs for a whole batch in one round trip
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    await pipe.ttl(key)
+                ttls = await pipe.execute()
+            return sum(1 for ttl in ttls if ttl == -2)  # Key doesn't exist (expired)
+        
+        async for key in self.redis.scan_iter(match=pattern, count=count):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                expired_count += await count_expired(batch)
+                batch = []
+        
+        if batch:
+            expired_count += await count_expired(batch)
         
         return expired_count
 
@@ -151,7 +361,26 @@ class ContextMiddleware(Generic[T]):
     
     def __init__(self, context_manager: DistributedContextManager[T]):
         self.context_manager = context_manager
-    
+
+    def context_key(self, session_id: str) -> str:
+        """Get the Redis key holding a session's context, e.g. for pipelining."""
+        return self.context_manager._get_key(session_id)
+
+    async def get_raw(self, session_id: str) -> Optional[bytes | str]:
+        """Get the serialized context for a session without deserializing it."""
+        return await self.context_manager.redis.get(self.context_key(session_id))
+
+    def serialize(self, context: T) -> bytes:
+        """Serialize a context the same way it is stored in Redis."""
+        return self.context_manager._serialize_context(context)
+
+    def deserialize(self, raw: str | bytes) -> Optional[T]:
+        """Deserialize a raw context payload. Returns None if it is invalid."""
+        try:
+            return self.context_manager._deserialize_context(raw)
+        except Exception:
+            return None
+
     async def get_or_create_context(
         self, 
         session_id: str, 
@@ -159,26 +388,38 @@ class ContextMiddleware(Generic[T]):
         ttl: Optional[int] = None
     ) -> T:
         """Get existing context or create with provided default."""
-        # Try to get existing context
-        context = await self.context_manager.get_context(session_id)
+        # Fetch the existing context (refreshing its TTL) or store the
+        # default in a single round trip
+        manager = self.context_manager
+        raw = await manager._get_or_set(
+            manager._get_key(session_id),
+            lambda: manager._serialize_context(default_context),
+            ttl or manager.default_ttl,
+        )
         
+        if raw is None:
+            return default_context
+        
+        context = self.deserialize(raw)
         if context is None:
-            # Use the provided default context
-            await self.context_manager.store_context(session_id, default_context, ttl)
+            # Stored context is unreadable, replace it with the default
+            await manager.store_context(session_id, default_context, ttl)
             return default_context
-        else:
-            # Update TTL for existing context
-            await self.context_manager.extend_ttl(session_id, ttl)
-            return context
+        return context
     
     async def save_context(
         self, 
         session_id: str, 
         context: T,
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        background: bool = False
     ) -> None:
-        """Save context back to Redis."""
-        await self.context_manager.store_context(session_id, context, ttl)
+        """Save context back to Redis, optionally without waiting for the write."""
+        await self.context_manager.store_context(session_id, context, ttl, background)
+    
+    async def get_contexts(self, session_ids: List[str]) -> Dict[str, Optional[T]]:
+        """Get contexts for several sessions in one round trip."""
+        return await self.context_manager.get_contexts(session_ids)
     
     async def update_context_fields(
         self,
@@ -193,6 +434,6 @@ class ContextMiddleware(Generic[T]):
         """Clear context for a session."""
         return await self.context_manager.delete_context(session_id)
     
-    async def get_all_active_sessions(self) -> List[str]:
+    async def get_all_active_sessions(self, count: int = 1000) -> List[str]:
         """Get all sessions with active contexts."""
-        return await self.context_manager.get_all_sessions()
\ No newline at end of file
+        return await self.context_manager.get_all_sessions(count)
\ No newline at end of file
@@ -7,14 +7,11 @@ existing RedisSession infrastructure and the new context management system.
 
 from __future__ import annotations
 
+import asyncio
 from typing import Optional, Dict, Any
 from .session import RedisSessionManager
 from .context import DistributedContextManager, ContextMiddleware
-
-try:
-    import redis.asyncio as redis
-except ImportError:
-    raise ImportError("redis package is required")
+from .models import AgentMemoryContext
 
 
 class UnifiedSessionManager:
@@ -47,14 +44,8 @@ class UnifiedSessionManager:
             max_connections=max_connections,
         )
         
-        # Create Redis client for context manager (shares same connection pool concept)
-        self._redis_client = redis.from_url(
-            redis_url,
-            db=db,
-            decode_responses=True,
-            retry_on_error=[redis.BusyLoadingError, redis.ConnectionError],
-            retry_on_timeout=True,
-        )
+        # Context manager shares the session manager's client and connection pool
+        self._redis_client = self.session_manager._client
         
         # Initialize context manager
         self.context_manager = DistributedContextManager(
@@ -94,22 +85,25 @@ class UnifiedSessionManager:
         self,
         session_id: str,
         context: AgentMemoryContext,
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        background: bool = False
     ) -> None:
-        """Save context to Redis."""
-        await self.context_middleware.save_context(session_id, context, ttl)
+        """Save context to Redis, optionally without waiting for the write."""
+        await self.context_middleware.save_context(session_id, context, ttl, background)
     
     async def delete_session_completely(self, session_id: str) -> Dict[str, bool]:
         """Delete both session messages and context."""
-        results = {}
-        
-        # Delete session messages (your existing method)
-        results["messages_deleted"] = await self.session_manager.delete_session(session_id)
-        
-        # Delete context
-        results["context_deleted"] = await self.context_middleware.clear_context(session_id)
+        # Both deletes are single UNLINKs; run them concurrently so the caller
+        # waits for one round trip instead of two
+        messages_deleted, context_deleted = await asyncio.gather(
+            self.session_manager.delete_session(session_id),
+            self.context_middleware.clear_context(session_id),
+        )
         
-        return results
+        return {
+            "messages_deleted": messages_deleted,
+            "context_deleted": context_deleted,
+        }
     
     async def get_session_overview(self, session_id: str) -> Dict[str, Any]:
         """Get comprehensive overview of session and context."""
@@ -156,9 +150,9 @@ class UnifiedSessionManager:
         }
     
     async def close(self) -> None:
-        """Close all connections."""
+        """Close all connections (the pool is shared, so it is closed once)."""
+        await self.context_manager.flush_pending_writes()
         await self.session_manager.close()
-        await self._redis_client.aclose()
 
 
 class AgentSessionWrapper:
@@ -1,15 +1,26 @@
+"""
+Context models used by UnifiedSessionManager.
+
+AgentMemoryContext is the default context persisted alongside each session's
+message history; the nested models hold its intent, profile and conversation
+memory.
+"""
+
 from typing import Dict, Any, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field
+import time
 
-# Example context models
+try:
+    from pydantic import BaseModel, Field
+except ImportError:
+    raise ImportError("pydantic package is required")
 
 
 class IntentContext(BaseModel):
     """Context for storing user intent information."""
     label: str
     confidence: Optional[float] = None
-    timestamp: Optional[float] = Field(default_factory=lambda: datetime.now().timestamp())
+    timestamp: Optional[float] = Field(default_factory=time.time)
     entities: Dict[str, Any] = Field(default_factory=dict)
 
 class ProfileContext(BaseModel):
@@ -17,13 +28,13 @@ class ProfileContext(BaseModel):
     label: str
     user_id: Optional[str] = None
     additional_data: Dict[str, Any] = Field(default_factory=dict)
-    timestamp: Optional[float] = Field(default_factory=lambda: datetime.now().timestamp())
+    timestamp: Optional[float] = Field(default_factory=time.time)
 
 class ConversationContext(BaseModel):
     """Context for storing conversation information."""
     message: str
     response: str
-    timestamp: Optional[float] = Field(default_factory=lambda: datetime.now().timestamp())
+    timestamp: Optional[float] = Field(default_factory=time.time)
 
 class AgentMemoryContext(BaseModel):
     """
@@ -43,8 +54,8 @@ class AgentMemoryContext(BaseModel):
     conversation_summary: Optional[str] = None
     
     # Metadata
-    created_at: float = Field(default_factory=lambda: datetime.now().timestamp())
-    last_updated: float = Field(default_factory=lambda: datetime.now().timestamp())
+    created_at: float = Field(default_factory=time.time)
+    last_updated: float = Field(default_factory=time.time)
     total_interactions: int = 0
     
     # Helper methods for updating contexts
@@ -78,7 +89,7 @@ class AgentMemoryContext(BaseModel):
     
     def _touch(self) -> None:
         """Update the last_updated timestamp."""
-        self.last_updated = datetime.now().timestamp()
+        self.last_updated = time.time()
     
     def get_context_summary(self) -> Dict[str, Any]:
         """Get a summary of the current context state."""
@@ -94,4 +105,4 @@ class AgentMemoryContext(BaseModel):
             "latest_profile": self.profile_context.label if self.profile_context else None,
             "created_at": datetime.fromtimestamp(self.created_at).isoformat(),
             "last_updated": datetime.fromtimestamp(self.last_updated).isoformat(),
-        }
\ No newline at end of file
+        }
@@ -1,15 +1,30 @@
 from __future__ import annotations
 
-import json
+import asyncio
 import time
-from typing import TYPE_CHECKING
+import weakref
+from typing import TYPE_CHECKING, AsyncIterator, Literal
 
 try:
+    import orjson
     import redis.asyncio as redis
     if TYPE_CHECKING:
         from agents.items import TResponseInputItem
 except ImportError:
-    raise ImportError("redis and openai-agents packages are required")
+    raise ImportError("redis, orjson and openai-agents packages are required")
+
+from ._utils import ZSTD_MAGIC, safe_delete
+
+
+# Pop up to ARGV[1] items from the tail and, only if something was popped and
+# ARGV[2] is set, record it as the new `updated_at`
+POP_ITEMS_SCRIPT = """
+local items = redis.call('RPOP', KEYS[1], ARGV[1])
+if items and ARGV[2] ~= '' then
+    redis.call('HSET', KEYS[2], 'updated_at', ARGV[2])
+end
+return items
+"""
 
 
 class RedisSession:
@@ -28,6 +43,10 @@ class RedisSession:
         session_prefix: str = "agent_session",
         messages_prefix: str = "agent_messages",
         ttl: int | None = None,
+        touch_interval: float = 0.0,
+        serializer: Literal["json", "msgpack"] = "json",
+        client: redis.Redis | None = None,
+        compress_threshold: int | None = None,
     ):
         """Initialize the Redis session.
 
@@ -38,6 +57,18 @@ class RedisSession:
             session_prefix: Prefix for session metadata keys. Defaults to 'agent_session'
             messages_prefix: Prefix for message list keys. Defaults to 'agent_messages'
             ttl: Time-to-live for session data in seconds. If None, data persists indefinitely
+            touch_interval: Minimum seconds between writes of `updated_at` and TTL
+                refreshes from this instance. Defaults to 0 (refresh on every write);
+                keep it well below `ttl` so active sessions don't expire
+            serializer: Encoding for stored items. 'msgpack' is more compact and
+                faster but needs a client without decode_responses, and cannot
+                read items stored as JSON. Defaults to 'json'
+            client: Existing Redis client to use instead of creating one from
+                `redis_url` and `db`, e.g. to share a connection pool. The
+                session does not close it
+            compress_threshold: Compress items larger than this many bytes with
+                zstd. Compressed items are recognized on read regardless of this
+                setting. Requires a client without decode_responses
         """
         self.session_id = session_id
         self.redis_url = redis_url
@@ -45,12 +76,47 @@ class RedisSession:
         self.session_prefix = session_prefix
         self.messages_prefix = messages_prefix
         self.ttl = ttl
+        self.touch_interval = touch_interval
+        self._last_touch = 0.0
+        self.serializer = serializer
+        
+        if serializer == "msgpack":
+            try:
+                import msgpack
+            except ImportError:
+                raise ImportError("msgpack package is required for the msgpack serializer")
+            self._dumps = msgpack.packb
+            self._loads = msgpack.unpackb
+        else:
+            self._dumps = orjson.dumps
+            self._loads = orjson.loads
+        
+        self.compress_threshold = compress_threshold
+        self._compress = None
+        self._decompress = None
+        if compress_threshold is not None:
+            self._load_zstd()
         
         # Redis keys for this session
         self.session_key = f"{session_prefix}:{session_id}"
         self.messages_key = f"{messages_prefix}:{session_id}"
         
-        self._redis_client: redis.Redis | None = None
+        self._redis_client: redis.Redis | None = client
+        # Only clients created by the session are closed by it
+        self._owns_client = False
+        self._pop_script = None
+        # Calls waiting to be written by the in-flight add_items; None when idle
+        self._write_queue: list[tuple[list[bytes], asyncio.Future]] | None = None
+
+    def _load_zstd(self) -> None:
+        """Create the zstd compressor and decompressor."""
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard package is required for session compression")
+        self._compress = zstandard.ZstdCompressor(level=3).compress
+        self._decompress = zstandard.ZstdDecompressor().decompress
+        self._zstd_error = zstandard.ZstdError
 
     async def _get_redis_client(self) -> redis.Redis:
         """Get or create Redis client."""
@@ -58,41 +124,40 @@ class RedisSession:
             self._redis_client = redis.from_url(
                 self.redis_url,
                 db=self.db,
-                decode_responses=True,
+                # Items are decoded straight from bytes (orjson and msgpack both
+                # accept them), so skip redis-py's per-reply UTF-8 decode
+                decode_responses=False,
                 retry_on_error=[redis.BusyLoadingError, redis.ConnectionError],
                 retry_on_timeout=True,
             )
+            self._owns_client = True
         return self._redis_client
 
-    async def _ensure_session_exists(self, client: redis.Redis) -> None:
-        """Ensure session metadata exists in Redis."""
-        current_time = time.time()  # Use float for higher precision
-        
-        # Check if session already exists
-        exists = await client.exists(self.session_key)
-        if not exists:
-            # Create session metadata only if it doesn't exist
-            await client.hset(
-                self.session_key,
-                mapping={
-                    "session_id": self.session_id,
-                    "created_at": str(current_time),
-                    "updated_at": str(current_time),
-                }
-            )
+    def _should_touch(self, current_time: float) -> bool:
+        """Whether `updated_at` and TTLs are due for a refresh (debounced by touch_interval)."""
+        if current_time - self._last_touch < self.touch_interval:
+            return False
+        self._last_touch = current_time
+        return True
+
+    async def _queue_append(self, pipe: redis.client.Pipeline, serialized_items: list[bytes]) -> None:
+        """Queue appending items to the history; the last queued command returns its length."""
+        await pipe.rpush(self.messages_key, *serialized_items)
+
+    async def _queue_touch(self, pipe: redis.client.Pipeline, current_time: float) -> None:
+        """Queue the `updated_at` write and TTL refreshes on a pipeline."""
+        await pipe.hset(
+            self.session_key,
+            mapping={
+                "session_id": self.session_id,
+                "updated_at": str(current_time),
+            },
+        )
         
-        # Set TTL if specified (always refresh TTL)
+        # Set TTL if specified
         if self.ttl is not None:
-            await client.expire(self.session_key, self.ttl)
-            # For messages key, we only set TTL if it exists
-            # If it doesn't exist yet, TTL will be set when first message is added
-            if await client.exists(self.messages_key):
-                await client.expire(self.messages_key, self.ttl)
-
-    async def _update_session_timestamp(self, client: redis.Redis) -> None:
-        """Update the session's last updated timestamp."""
-        current_time = time.time()  # Use float for higher precision
-        await client.hset(self.session_key, "updated_at", str(current_time))
+            await pipe.expire(self.session_key, self.ttl)
+            await pipe.expire(self.messages_key, self.ttl)
 
     async def get_items(self, limit: int | None = None) -> list[TResponseInputItem]:
         """Retrieve the conversation history for this session.
@@ -110,16 +175,100 @@ class RedisSession:
             # Get all items from the list (oldest to newest)
             raw_items = await client.lrange(self.messages_key, 0, -1)
         else:
-            # Get the latest N items (newest to oldest), then reverse
+            # Get the latest N items; a negative start keeps chronological order
             raw_items = await client.lrange(self.messages_key, -limit, -1)
         
+        return self._decode_items(raw_items)
+
+    async def get_items_and_size(
+        self, limit: int | None = None
+    ) -> tuple[list[TResponseInputItem], int]:
+        """Retrieve the conversation history and the total message count in one round trip.
+
+        Args:
+            limit: Maximum number of items to retrieve, as in `get_items`
+
+        Returns:
+            Tuple of the items and the number of messages in the session
+        """
+        client = await self._get_redis_client()
+        
+        async with client.pipeline(transaction=False) as pipe:
+            await pipe.lrange(self.messages_key, 0 if limit is None else -limit, -1)
+            await pipe.llen(self.messages_key)
+            raw_items, size = await pipe.execute()
+        
+        return self._decode_items(raw_items), size
+
+    async def iter_items(self, chunk_size: int = 500) -> AsyncIterator[TResponseInputItem]:
+        """Iterate over the conversation history in chunks, oldest first.
+
+        Unlike `get_items`, only `chunk_size` items are held in memory at a time.
+        Items added or popped concurrently may be missed or seen twice.
+
+        Args:
+            chunk_size: Number of items fetched per LRANGE call
+        """
+        client = await self._get_redis_client()
+        
+        start = 0
+        while True:
+            raw_items = await client.lrange(self.messages_key, start, start + chunk_size - 1)
+            if not raw_items:
+                return
+            for item in self._decode_items(raw_items):
+                yield item
+            if len(raw_items) < chunk_size:
+                return
+            start += chunk_size
+
+    def _serialize_items(self, items: list[TResponseInputItem]) -> list[bytes]:
+        """Serialize items, compressing the ones above `compress_threshold`."""
+        dumps = self._dumps
+        if self.compress_threshold is None:
+            return [dumps(item) for item in items]
+        
+        compress, threshold = self._compress, self.compress_threshold
+        payloads = []
+        for item in items:
+            payload = dumps(item)
+            payloads.append(compress(payload) if len(payload) > threshold else payload)
+        return payloads
+
+    def _decode_item(self, raw_item: bytes | str) -> TResponseInputItem:
+        """Decode one raw entry, inflating it first if it is zstd-compressed."""
+        try:
+            return self._loads(raw_item)
+        except ValueError:
+            # Compressed frames are never valid JSON or a single msgpack object
+            if not (isinstance(raw_item, bytes) and raw_item.startswith(ZSTD_MAGIC)):
+                raise
+        if self._decompress is None:
+            self._load_zstd()
+        try:
+            payload = self._decompress(raw_item)
+        except self._zstd_error as exc:
+            # Surface corrupt frames like invalid JSON so callers skip them
+            raise ValueError("Corrupt zstd-compressed item") from exc
+        return self._loads(payload)
+
+    def _decode_items(self, raw_items: list) -> list[TResponseInputItem]:
+        """Decode raw list entries, skipping invalid ones."""
+        if self.compress_threshold is None:
+            loads = self._loads
+            try:
+                return [loads(raw_item) for raw_item in raw_items]
+            except ValueError:
+                pass
+        
+        # Slow path: inflate compressed entries and skip invalid ones (both
+        # decoders raise ValueError subclasses)
+        decode_item = self._decode_item
         items = []
         for raw_item in raw_items:
             try:
-                item = json.loads(raw_item)
-                items.append(item)
-            except json.JSONDecodeError:
-                # Skip invalid JSON entries
+                items.append(decode_item(raw_item))
+            except ValueError:
                 continue
         
         return items
@@ -133,27 +282,109 @@ class RedisSession:
         if not items:
             return
 
-        client = await self._get_redis_client()
+        await self.add_items_raw(self._serialize_items(items))
+
+    async def add_items_raw(self, payloads: list[bytes]) -> None:
+        """Add already-serialized items to the conversation history.
+
+        Lets callers that replay the same items encode them once. Payloads must
+        be encoded with this session's serializer; they are stored as given,
+        without compression.
+
+        Args:
+            payloads: Serialized items to add to the history
+
+        Raises:
+            redis.ConnectionError: If this call's items were coalesced into a
+                write whose task was cancelled mid-flight, so they may or may
+                not have been stored
+        """
+        if not payloads:
+            return
+
+        serialized_items = list(payloads)
+        
+        if self._write_queue is not None:
+            # Another add_items on this instance is in flight: join the batch
+            # it sends next instead of paying a round trip of our own
+            future = asyncio.get_running_loop().create_future()
+            self._write_queue.append((serialized_items, future))
+            if await future:
+                return
+            # The writer was cancelled before sending our batch: write it ourselves
+            await self.add_items_raw(serialized_items)
+            return
         
-        # Use pipeline for atomic operations
-        async with client.pipeline() as pipe:
-            # Ensure session exists
-            await self._ensure_session_exists(client)
+        self._write_queue = []
+        batch = []
+        try:
+            error = None
+            try:
+                await self._write_items(serialized_items)
+            except Exception as exc:
+                error = exc
             
-            # Add items to the end of the list (maintaining chronological order)
-            serialized_items = [json.dumps(item) for item in items]
-            await pipe.rpush(self.messages_key, *serialized_items)
+            # Flush calls that arrived meanwhile, one RPUSH per batch, in arrival order
+            while self._write_queue:
+                batch, self._write_queue = self._write_queue, []
+                try:
+                    await self._write_items(
+                        [payload for payloads, _ in batch for payload in payloads]
+                    )
+                except Exception as exc:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(exc)
+                else:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_result(True)
+        finally:
+            # Only reached with unresolved calls if this task was cancelled mid-write.
+            # The in-flight batch may or may not have been written
+            interrupted = redis.ConnectionError("add_items was cancelled while writing this batch")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(interrupted)
+            # Queued batches were never sent; their callers retry on their own
+            queued, self._write_queue = self._write_queue, None
+            for _, future in queued:
+                if not future.done():
+                    future.set_result(False)
+        
+        if error is not None:
+            raise error
+
+    async def _write_items(self, serialized_items: list[bytes]) -> None:
+        """Append serialized items and refresh session metadata in one round trip."""
+        client = await self._get_redis_client()
+        
+        current_time = time.time()  # Use float for higher precision
+        touch = self._should_touch(current_time)
+        
+        # Pipeline without MULTI/EXEC: the commands only need one round trip, not atomicity
+        async with client.pipeline(transaction=False) as pipe:
+            # Seed session metadata in the same round trip; created_at is only
+            # written the first time
+            await pipe.hsetnx(self.session_key, "created_at", str(current_time))
             
-            # Update session timestamp
-            current_time = time.time()  # Use float for higher precision
-            await pipe.hset(self.session_key, "updated_at", str(current_time))
+            # Add items to the end of the history (maintaining chronological order)
+            await self._queue_append(pipe, serialized_items)
+            length_index = len(pipe) - 1
             
-            # Set TTL if specified
-            if self.ttl is not None:
-                await pipe.expire(self.session_key, self.ttl)
-                await pipe.expire(self.messages_key, self.ttl)
+            if touch:
+                await self._queue_touch(pipe, current_time)
             
-            await pipe.execute()
+            results = await pipe.execute()
+        
+        created, history_length = results[0], results[length_index]
+        if not touch and (created or history_length == len(serialized_items)):
+            # A debounced write created the metadata or message list, which
+            # still need their fields and TTL
+            self._last_touch = current_time
+            async with client.pipeline(transaction=False) as pipe:
+                await self._queue_touch(pipe, current_time)
+                await pipe.execute()
 
     async def pop_item(self) -> TResponseInputItem | None:
         """Remove and return the most recent item from the session.
@@ -161,30 +392,65 @@ class RedisSession:
         Returns:
             The most recent item if it exists, None if the session is empty
         """
-        client = await self._get_redis_client()
+        raw_items = await self._pop(1)
         
-        # Pop from the right end of the list (most recent item)
-        raw_item = await client.rpop(self.messages_key)
-        
-        if raw_item is None:
+        if not raw_items:
             return None
         
-        # Update session timestamp after successful pop
-        await self._update_session_timestamp(client)
-        
         try:
-            item = json.loads(raw_item)
+            item = self._decode_item(raw_items[0])
             return item
-        except json.JSONDecodeError:
-            # Return None for corrupted JSON entries (already deleted)
+        except ValueError:
+            # Return None for corrupted entries (already deleted)
             return None
 
+    async def pop_items(self, count: int) -> list[TResponseInputItem]:
+        """Remove and return up to `count` of the most recent items in one call.
+
+        Args:
+            count: Maximum number of items to pop
+
+        Returns:
+            The popped items, most recent first. Corrupted entries are removed
+            but not returned
+        """
+        raw_items = await self._pop(count)
+        
+        if not raw_items:
+            return []
+        
+        return self._decode_items(raw_items)
+
+    async def _pop(self, count: int) -> list:
+        """Pop raw items and update the session timestamp in a single atomic call."""
+        client = await self._get_redis_client()
+        
+        # Debounced like other writes, but only counted as a touch once
+        # something was actually popped
+        current_time = time.time()  # Use float for higher precision
+        touch = current_time - self._last_touch >= self.touch_interval
+        
+        raw_items = await self._pop_entries(client, count, str(current_time) if touch else "")
+        
+        if raw_items and touch:
+            self._last_touch = current_time
+        return raw_items
+
+    async def _pop_entries(self, client: redis.Redis, count: int, touch_time: str) -> list | None:
+        """Atomically pop the newest `count` payloads, setting `updated_at` to `touch_time` if given."""
+        if self._pop_script is None:
+            self._pop_script = client.register_script(POP_ITEMS_SCRIPT)
+        return await self._pop_script(
+            keys=[self.messages_key, self.session_key], args=[count, touch_time], client=client
+        )
+
     async def clear_session(self) -> None:
         """Clear all items for this session."""
         client = await self._get_redis_client()
         
         # Delete both session metadata and messages
-        await client.delete(self.session_key, self.messages_key)
+        await safe_delete(client, self.session_key, self.messages_key)
+        self._last_touch = 0.0
 
     async def get_session_info(self) -> dict[str, str] | None:
         """Get session metadata.
@@ -193,9 +459,31 @@ class RedisSession:
             Dictionary containing session metadata, or None if session doesn't exist
         """
         client = await self._get_redis_client()
-        session_data = await client.hgetall(self.session_key)
+        return self._decode_session_info(await client.hgetall(self.session_key))
+
+    async def get_session_info_and_size(self) -> tuple[dict[str, str] | None, int]:
+        """Get session metadata and the number of messages in one round trip.
+
+        Returns:
+            Tuple of the metadata, as in `get_session_info`, and the message count
+        """
+        client = await self._get_redis_client()
         
-        return session_data if session_data else None
+        async with client.pipeline(transaction=False) as pipe:
+            await pipe.hgetall(self.session_key)
+            await pipe.llen(self.messages_key)
+            session_data, size = await pipe.execute()
+        
+        return self._decode_session_info(session_data), size
+
+    @staticmethod
+    def _decode_session_info(session_data: dict) -> dict[str, str] | None:
+        if not session_data:
+            return None
+        if isinstance(next(iter(session_data)), bytes):
+            # Client without decode_responses
+            return {key.decode(): value.decode() for key, value in session_data.items()}
+        return session_data
 
     async def get_session_size(self) -> int:
         """Get the number of messages in the session.
@@ -207,10 +495,15 @@ class RedisSession:
         return await client.llen(self.messages_key)
 
     async def close(self) -> None:
-        """Close the Redis connection."""
-        if self._redis_client is not None:
+        """Close the Redis connection.
+
+        A client passed in (e.g. a manager's shared client) is left open and
+        attached, so other holders of this session keep using it.
+        """
+        if self._redis_client is not None and self._owns_client:
             await self._redis_client.aclose()
             self._redis_client = None
+            self._owns_client = False
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -232,6 +525,8 @@ class RedisSessionManager:
         messages_prefix: str = "agent_messages",
         default_ttl: int | None = 30,
         max_connections: int = 20,
+        session_class: type[RedisSession] = RedisSession,
+        serializer: Literal["json", "msgpack"] = "json",
     ):
         """Initialize the Redis session manager.
 
@@ -242,19 +537,42 @@ class RedisSessionManager:
             messages_prefix: Prefix for message list keys
             default_ttl: Default TTL for sessions in seconds
             max_connections: Maximum number of Redis connections in the pool
+            session_class: Session type handed out by `get_session`. Pass
+                `RedisStreamSession` to store histories in streams
+            serializer: Encoding for items stored by sessions from this manager,
+                as in `RedisSession`. Defaults to 'json'
         """
         self.redis_url = redis_url
         self.db = db
         self.session_prefix = session_prefix
         self.messages_prefix = messages_prefix
         self.default_ttl = default_ttl
+        self.session_class = session_class
+        self.serializer = serializer
+        
+        # Key prefixes precomputed for the admin paths
+        self._session_prefix_colon = f"{session_prefix}:"
+        self._messages_prefix_colon = f"{messages_prefix}:"
         
         self._redis_pool = redis.ConnectionPool.from_url(
             redis_url,
             db=db,
             max_connections=max_connections,
-            decode_responses=True,
+            # Sessions decode items straight from bytes; the few string replies
+            # (session metadata, key names) are decoded where they are returned
+            decode_responses=False,
         )
+        # One client wrapper shared by the manager and all of its sessions
+        self._client = redis.Redis(connection_pool=self._redis_pool)
+        # Live sessions by (session_id, ttl); entries drop once callers release them
+        self._sessions: weakref.WeakValueDictionary[tuple[str, int | None], RedisSession] = (
+            weakref.WeakValueDictionary()
+        )
+
+    @property
+    def connection_pool(self) -> redis.ConnectionPool:
+        """The connection pool shared by all sessions from this manager."""
+        return self._redis_pool
 
     def get_session(
         self,
@@ -268,50 +586,51 @@ class RedisSessionManager:
             ttl: TTL for this session. If None, uses default_ttl
 
         Returns:
-            RedisSession instance
+            RedisSession instance. Repeated calls with the same session_id and
+            ttl return the same instance while it is still referenced
         """
-        session = RedisSession(
-            session_id=session_id,
-            redis_url=self.redis_url,
-            db=self.db,
-            session_prefix=self.session_prefix,
-            messages_prefix=self.messages_prefix,
-            ttl=ttl or self.default_ttl,
-        )
-        
-        # Share the connection pool
-        session._redis_client = redis.Redis(connection_pool=self._redis_pool)
+        session_ttl = ttl or self.default_ttl
+        session = self._sessions.get((session_id, session_ttl))
+        if session is None:
+            session = self.session_class(
+                session_id=session_id,
+                redis_url=self.redis_url,
+                db=self.db,
+                session_prefix=self.session_prefix,
+                messages_prefix=self.messages_prefix,
+                ttl=session_ttl,
+                serializer=self.serializer,
+                # Share the manager's client (and its connection pool)
+                client=self._client,
+            )
+            self._sessions[(session_id, session_ttl)] = session
         
         return session
 
-    async def list_sessions(self, pattern: str | None = None) -> list[str]:
+    async def list_sessions(self, pattern: str | None = None, count: int = 1000) -> list[str]:
         """List all session IDs.
 
         Args:
             pattern: Optional pattern to filter session IDs
+            count: Number of keys Redis inspects per SCAN call
 
         Returns:
             List of session IDs
         """
-        client = redis.Redis(connection_pool=self._redis_pool)
-        
-        if pattern:
-            search_pattern = f"{self.session_prefix}:{pattern}"
-        else:
-            search_pattern = f"{self.session_prefix}:*"
-        
-        keys = await client.keys(search_pattern)
+        client = self._client
+        prefix = self._session_prefix_colon
+        search_pattern = prefix + (pattern or "*")
         
-        # Extract session IDs from keys
-        session_ids = []
-        prefix_len = len(self.session_prefix) + 1  # +1 for the colon
+        # SCAN instead of KEYS so large keyspaces don't block the server;
+        # SCAN may return a key more than once, so collect into a dict
+        session_ids = {}
         
-        for key in keys:
-            session_id = key[prefix_len:]
-            session_ids.append(session_id)
+        # The pool doesn't decode replies, so keys come back as bytes
+        byte_prefix = prefix.encode()
+        async for key in client.scan_iter(match=search_pattern, count=count):
+            session_ids[key.removeprefix(byte_prefix).decode()] = None
         
-        await client.aclose()
-        return session_ids
+        return list(session_ids)
 
     async def delete_session(self, session_id: str) -> bool:
         """Delete a session and all its data.
@@ -322,13 +641,10 @@ class RedisSessionManager:
         Returns:
             True if session was deleted, False if it didn't exist
         """
-        client = redis.Redis(connection_pool=self._redis_pool)
-        
-        session_key = f"{self.session_prefix}:{session_id}"
-        messages_key = f"{self.messages_prefix}:{session_id}"
+        session_key = self._session_prefix_colon + session_id
+        messages_key = self._messages_prefix_colon + session_id
         
-        deleted_count = await client.delete(session_key, messages_key)
-        await client.aclose()
+        deleted_count = await safe_delete(self._client, session_key, messages_key)
         
         return deleted_count > 0
 
@@ -342,4 +658,209 @@ class RedisSessionManager:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        await self.close()
\ No newline at end of file
+        await self.close()
+
+
+# Atomically remove the newest ARGV[1] stream entries and return their payloads,
+# newest first; bump updated_at when ARGV[2] is set and something was removed
+POP_STREAM_ENTRIES_SCRIPT = """
+local entries = redis.call('XREVRANGE', KEYS[1], '+', '-', 'COUNT', ARGV[1])
+local items = {}
+for i, entry in ipairs(entries) do
+    redis.call('XDEL', KEYS[1], entry[1])
+    items[i] = entry[2][2]
+end
+if #items > 0 and ARGV[2] ~= '' then
+    redis.call('HSET', KEYS[2], 'updated_at', ARGV[2])
+end
+return items
+"""
+
+
+class RedisStreamSession(RedisSession):
+    """Redis session that stores conversation history in a stream.
+
+    Each item is a stream entry with a single `data` field. Entry IDs allow
+    incremental reads with `get_entries_since`, and `max_items` caps the
+    history with approximate trimming on every `XADD`.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        redis_url: str = "redis://localhost:6379",
+        db: int = 0,
+        session_prefix: str = "agent_session",
+        messages_prefix: str = "agent_messages",
+        ttl: int | None = None,
+        touch_interval: float = 0.0,
+        serializer: Literal["json", "msgpack"] = "json",
+        max_items: int | None = None,
+        client: redis.Redis | None = None,
+        compress_threshold: int | None = None,
+    ):
+        """Initialize the Redis stream session.
+
+        Args:
+            max_items: Approximate maximum number of items kept in the stream.
+                If None, the history is not trimmed.
+
+        See `RedisSession` for the remaining arguments.
+        """
+        super().__init__(
+            session_id=session_id,
+            redis_url=redis_url,
+            db=db,
+            session_prefix=session_prefix,
+            messages_prefix=messages_prefix,
+            ttl=ttl,
+            touch_interval=touch_interval,
+            serializer=serializer,
+            client=client,
+            compress_threshold=compress_threshold,
+        )
+        self.max_items = max_items
+
+    @staticmethod
+    def _entry_payloads(entries: list) -> list:
+        """Extract the raw `data` payloads from stream entries."""
+        return [fields.get("data", fields.get(b"data")) for _, fields in entries]
+
+    async def get_items(self, limit: int | None = None) -> list[TResponseInputItem]:
+        """Retrieve the conversation history for this session.
+
+        Args:
+            limit: Maximum number of items to retrieve. If None, retrieves all items.
+                   When specified, returns the latest N items in chronological order.
+
+        Returns:
+            List of input items representing the conversation history
+        """
+        client = await self._get_redis_client()
+        
+        if limit is None:
+            entries = await client.xrange(self.messages_key)
+        else:
+            # Get the latest N entries (newest to oldest), then reverse
+            entries = await client.xrevrange(self.messages_key, count=limit)
+            entries.reverse()
+        
+        return self._decode_items(self._entry_payloads(entries))
+
+    async def get_items_and_size(
+        self, limit: int | None = None
+    ) -> tuple[list[TResponseInputItem], int]:
+        """Retrieve the conversation history and the total message count in one round trip.
+
+        Args:
+            limit: Maximum number of items to retrieve, as in `get_items`
+
+        Returns:
+            Tuple of the items and the number of messages in the session
+        """
+        client = await self._get_redis_client()
+        
+        async with client.pipeline(transaction=False) as pipe:
+            if limit is None:
+                await pipe.xrange(self.messages_key)
+            else:
+                await pipe.xrevrange(self.messages_key, count=limit)
+            await pipe.xlen(self.messages_key)
+            entries, size = await pipe.execute()
+        
+        if limit is not None:
+            entries.reverse()
+        return self._decode_items(self._entry_payloads(entries)), size
+
+    async def get_entries_since(
+        self, last_id: str = "-", count: int | None = None
+    ) -> list[tuple[str, TResponseInputItem]]:
+        """Retrieve items added after a stream entry ID.
+
+        Args:
+            last_id: Exclusive stream ID to read after. Defaults to the start of the stream.
+            count: Maximum number of entries to return
+
+        Returns:
+            List of (entry ID, item) pairs in chronological order
+        """
+        client = await self._get_redis_client()
+        
+        start = last_id if last_id == "-" else f"({last_id}"
+        entries = await client.xrange(self.messages_key, min=start, count=count)
+        
+        result = []
+        for entry_id, fields in entries:
+            try:
+                item = self._decode_item(fields.get("data", fields.get(b"data")))
+            except ValueError:
+                continue
+            if isinstance(entry_id, bytes):
+                entry_id = entry_id.decode()
+            result.append((entry_id, item))
+        return result
+
+    async def iter_items(self, chunk_size: int = 500) -> AsyncIterator[TResponseInputItem]:
+        """Iterate over the conversation history in chunks, oldest first.
+
+        Args:
+            chunk_size: Number of entries fetched per XRANGE call
+        """
+        client = await self._get_redis_client()
+        
+        start = "-"
+        while True:
+            entries = await client.xrange(self.messages_key, min=start, count=chunk_size)
+            if not entries:
+                return
+            for item in self._decode_items(self._entry_payloads(entries)):
+                yield item
+            if len(entries) < chunk_size:
+                return
+            last_id = entries[-1][0]
+            if isinstance(last_id, bytes):
+                last_id = last_id.decode()
+            start = f"({last_id}"
+
+    async def _queue_append(self, pipe: redis.client.Pipeline, serialized_items: list[bytes]) -> None:
+        """Queue one XADD per item, then XLEN so the last result is the history length."""
+        for serialized_item in serialized_items:
+            await pipe.xadd(
+                self.messages_key,
+                {"data": serialized_item},
+                maxlen=self.max_items,
+                approximate=True,
+            )
+        await pipe.xlen(self.messages_key)
+
+    async def _pop_entries(self, client: redis.Redis, count: int, touch_time: str) -> list:
+        """Atomically delete the newest `count` entries and return their payloads."""
+        if self._pop_script is None:
+            self._pop_script = client.register_script(POP_STREAM_ENTRIES_SCRIPT)
+        return await self._pop_script(
+            keys=[self.messages_key, self.session_key], args=[count, touch_time], client=client
+        )
+
+    async def get_session_size(self) -> int:
+        """Get the number of messages in the session.
+
+        Returns:
+            Number of messages in the session
+        """
+        client = await self._get_redis_client()
+        return await client.xlen(self.messages_key)
+
+    async def get_session_info_and_size(self) -> tuple[dict[str, str] | None, int]:
+        """Get session metadata and the number of messages in one round trip.
+
+        Returns:
+            Tuple of the metadata, as in `get_session_info`, and the message count
+        """
+        client = await self._get_redis_client()
+        
+        async with client.pipeline(transaction=False) as pipe:
+            await pipe.hgetall(self.session_key)
+            await pipe.xlen(self.messages_key)
+            session_data, size = await pipe.execute()
+        
+        return self._decode_session_info(session_data), size
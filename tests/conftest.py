@@ -1,80 +1,83 @@
 """Pytest configuration and fixtures for Redis session tests."""
 
 import asyncio
+import functools
+import orjson
+import os
+import shutil
 import subprocess
 import time
 import pytest
 import pytest_asyncio
+import redis as sync_redis
 import redis.asyncio as redis
-from typing import Generator, AsyncGenerator
+from pathlib import Path
+from typing import AsyncGenerator, Callable, Generator
 
-from agents_redis.session import RedisSession, RedisSessionManager
+from agents_redis.session import RedisSession, RedisSessionManager, RedisStreamSession
 
 
-@pytest.fixture(scope="session")
-def docker_redis() -> Generator[dict, None, None]:
-    """Start a Redis container for testing and clean it up after tests."""
-    container_name = "redis-test-container"
-    redis_port = "6380"  # Use different port to avoid conflicts
-    
-    # Check if Docker is available
+REDIS_IMAGE = "redis:7-alpine"
+REDIS_COMMAND = [
+    "redis-server",
+    "--save", "",  # No RDB snapshots or AOF: tests never rely on persistence
+    "--appendonly", "no",
+    "--maxmemory-policy", "noeviction",
+]
+REDIS_TMPFS = "rw,noexec,nosuid,size=128m"  # Keep the working set in memory
+
+# Set by pytest-xdist ("gw0", "gw1", ...); each worker gets its own database
+XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+TEST_DB = 15 - int(XDIST_WORKER[2:]) % 16 if XDIST_WORKER else 15
+
+
+def _docker_sdk_controls(docker, container_name: str, redis_port: str):
+    """Return ``(start, stop)`` functions driving the container through the Docker SDK."""
     try:
-        subprocess.run(
-            ["docker", "--version"], 
-            check=True, 
-            capture_output=True, 
-            text=True
-        )
-    except (subprocess.CalledProcessError, FileNotFoundError):
+        client = docker.from_env()
+        client.ping()
+    except docker.errors.DockerException:
         pytest.skip("Docker is not available")
     
-    # Stop any existing container with the same name
-    subprocess.run(
-        ["docker", "stop", container_name],
-        capture_output=True
-    )
-    subprocess.run(
-        ["docker", "rm", container_name],
-        capture_output=True
-    )
-    
-    # Start Redis container
-    try:
-        subprocess.run([
-            "docker", "run", 
-            "-d",  # Run in detached mode
-            "--name", container_name,
-            "-p", f"{redis_port}:6379",  # Map to different host port
-            "redis:7-alpine",
-            "redis-server", "--appendonly", "yes"
-        ], check=True, capture_output=True, text=True)
-        
-        # Wait for Redis to be ready
-        redis_url = f"redis://localhost:{redis_port}"
-        max_attempts = 30
-        for attempt in range(max_attempts):
-            try:
-                # Use sync redis client for the health check
-                import redis as sync_redis
-                client = sync_redis.from_url(redis_url)
-                client.ping()
-                client.close()
-                break
-            except redis.ConnectionError:
-                if attempt == max_attempts - 1:
-                    raise pytest.skip("Redis container failed to start")
-                time.sleep(1)
+    def start() -> None:
+        # Remove any existing container with the same name
+        try:
+            client.containers.get(container_name).remove(force=True)
+        except docker.errors.NotFound:
+            pass
         
-        # Yield connection info
-        yield {
-            "url": redis_url,
-            "host": "localhost", 
-            "port": int(redis_port),
-            "container_name": container_name
-        }
-        
-    finally:
-        # Cleanup: stop and remove the container
+        client.containers.run(
+            REDIS_IMAGE,
+            command=REDIS_COMMAND,
+            name=container_name,
+            ports={"6379/tcp": int(redis_port)},  # Map to different host port
+            tmpfs={"/data": REDIS_TMPFS},
+            detach=True,
+            remove=True,
+        )
+    
+    def stop() -> None:
+        try:
+            client.containers.get(container_name).stop(timeout=1)
+        except docker.errors.NotFound:
+            pass
+        client.close()
+    
+    return start, stop
+
+
+@functools.cache
+def _docker_cli_available() -> bool:
+    """Check for the docker CLI with a PATH lookup instead of spawning ``docker --version``."""
+    return shutil.which("docker") is not None
+
+
+def _docker_cli_controls(container_name: str, redis_port: str):
+    """Return ``(start, stop)`` functions driving the container through the docker CLI."""
+    if not _docker_cli_available():
+        pytest.skip("Docker is not available")
+    
+    def stop() -> None:
         subprocess.run(
             ["docker", "stop", container_name],
             capture_output=True
@@ -83,23 +86,138 @@ def docker_redis() -> Generator[dict, None, None]:
             ["docker", "rm", container_name], 
             capture_output=True
         )
+    
+    def start() -> None:
+        # Stop any existing container with the same name
+        stop()
+        
+        subprocess.run([
+            "docker", "run", 
+            "-d",  # Run in detached mode
+            "--name", container_name,
+            "-p", f"{redis_port}:6379",  # Map to different host port
+            "--tmpfs", f"/data:{REDIS_TMPFS}",
+            REDIS_IMAGE,
+            *REDIS_COMMAND,
+        ], check=True, capture_output=True, text=True)
+    
+    return start, stop
+
+
+def _acquire_shared_container(start, stop, lock_dir: Path):
+    """Start the container for the first xdist worker and return a release function.
+    
+    Workers count themselves in a file guarded by a file lock; the last one
+    to release the container stops it.
+    """
+    from filelock import FileLock
+    
+    lock = FileLock(str(lock_dir / "redis-test.lock"))
+    users_file = lock_dir / "redis-test.users"
+    
+    with lock:
+        users = int(users_file.read_text()) if users_file.exists() else 0
+        if users == 0:
+            start()
+        users_file.write_text(str(users + 1))
+    
+    def release() -> None:
+        with lock:
+            users = int(users_file.read_text()) - 1
+            users_file.write_text(str(users))
+            if users == 0:
+                stop()
+    
+    return release
+
+
+# Container stop function, set once docker_redis has started the container
+_release_container_key = pytest.StashKey[Callable[[], None]]()
 
 
 @pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.new_event_loop()
-    yield loop
-    loop.close()
+def docker_redis(request, tmp_path_factory) -> dict:
+    """Start a Redis container for testing; it is stopped in ``pytest_sessionfinish``.
+    
+    The container is only started once a test needs it, so runs without Redis
+    tests do not require Docker. Uses the Docker SDK when it is installed,
+    keeping a single connection to the daemon, and falls back to the docker
+    CLI otherwise. Under pytest-xdist all workers share one container, each on
+    its own database.
+    """
+    container_name = "redis-test-container"
+    redis_port = "6380"  # Use different port to avoid conflicts
+    
+    try:
+        import docker
+    except ImportError:
+        start, stop = _docker_cli_controls(container_name, redis_port)
+    else:
+        start, stop = _docker_sdk_controls(docker, container_name, redis_port)
+    
+    if XDIST_WORKER is None:
+        start()
+        release = stop
+    else:
+        # The parent of the per-worker base temp directory is shared by all workers
+        release = _acquire_shared_container(start, stop, tmp_path_factory.getbasetemp().parent)
+    # Registered before the readiness check so a failed start is still cleaned up
+    request.config.stash[_release_container_key] = release
+    
+    # Wait for Redis to be ready, backing off from 10ms up to 200ms
+    redis_url = f"redis://localhost:{redis_port}"
+    deadline = time.monotonic() + 5.0
+    delay = 0.01
+    while time.monotonic() < deadline:
+        try:
+            # Use sync redis client for the health check
+            client = sync_redis.from_url(redis_url, socket_connect_timeout=0.2)
+            client.ping()
+            client.close()
+            break
+        except (sync_redis.ConnectionError, sync_redis.TimeoutError):
+            time.sleep(delay)
+            delay = min(delay * 1.7, 0.2)
+    else:
+        pytest.skip("Redis container failed to start")
+    
+    return {
+        "url": redis_url,
+        "host": "localhost", 
+        "port": int(redis_port),
+        "db": TEST_DB,
+        "container_name": container_name
+    }
 
 
+def pytest_sessionfinish(session, exitstatus) -> None:
+    """Stop the Redis container, if a test started it.
+    
+    Runs after every session-scoped fixture has been torn down, including on
+    interrupt, so clients are closed before the container goes away.
+    """
+    release = session.config.stash.get(_release_container_key, None)
+    if release is not None:
+        del session.config.stash[_release_container_key]
+        release()
 
-@pytest_asyncio.fixture
-async def redis_client(docker_redis) -> AsyncGenerator[redis.Redis, None]:
-    """Provide a Redis client connected to the test container."""
+
+@pytest.fixture(scope="session")
+def event_loop_policy() -> asyncio.AbstractEventLoopPolicy:
+    """Run the async tests on uvloop when it is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.DefaultEventLoopPolicy()
+    return uvloop.EventLoopPolicy()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def _admin_client(docker_redis) -> AsyncGenerator[redis.Redis, None]:
+    """Provide one Redis client for the whole test session, shared by `redis_client`."""
     client = redis.from_url(
-        docker_redis["url"], 
-        db=15,  # Use test database (integer, not string)
+        docker_redis["url"],
+        db=docker_redis["db"],
         decode_responses=True
     )
     
@@ -108,27 +226,50 @@ async def redis_client(docker_redis) -> AsyncGenerator[redis.Redis, None]:
     
     yield client
     
-    # Cleanup: flush the test database and close
-    await client.flushdb()
     await client.aclose()
 
 
+@pytest.fixture(scope="session")
+def _flush_client(docker_redis) -> Generator[sync_redis.Redis, None, None]:
+    """Provide a sync Redis client used only to flush the test database between tests."""
+    client = sync_redis.from_url(docker_redis["url"], db=docker_redis["db"])
+    yield client
+    client.flushdb(asynchronous=True)
+    client.close()
+
+
+@pytest.fixture(autouse=True)
+def _flush_test_db(request) -> None:
+    """Flush the test database before every test that talks to Redis.
+    
+    This is a sync fixture so it can resolve the Redis fixtures lazily;
+    tests that never touch Redis do not start the container. ``FLUSHDB ASYNC``
+    frees the old keys in a background thread, like ``UNLINK``. Tests marked
+    ``shared_redis`` only touch their own keys and skip the flush; whatever
+    they leave behind is flushed before the next unmarked test or at the end
+    of the session.
+    """
+    if "docker_redis" in request.fixturenames and not request.node.get_closest_marker("shared_redis"):
+        request.getfixturevalue("_flush_client").flushdb(asynchronous=True)
+
+
+@pytest_asyncio.fixture
+async def redis_client(_admin_client) -> AsyncGenerator[redis.Redis, None]:
+    """Provide a Redis client connected to the test container."""
+    yield _admin_client
+
+
 @pytest_asyncio.fixture
 async def redis_session(docker_redis) -> AsyncGenerator[RedisSession, None]:
     """Provide a RedisSession instance connected to test container."""
     session = RedisSession(
         session_id="test_session_123",
         redis_url=docker_redis["url"],
-        db=15,  # Use test database (integer, not string)
+        db=docker_redis["db"],
         session_prefix="test_agent_session",
         messages_prefix="test_agent_messages"
     )
     
-    # Clean up any existing test data before yielding
-    client = redis.from_url(docker_redis["url"], db=15, decode_responses=True)
-    await client.flushdb()
-    await client.aclose()
-    
     yield session
     
     # Cleanup
@@ -137,31 +278,43 @@ async def redis_session(docker_redis) -> AsyncGenerator[RedisSession, None]:
 
 
 @pytest_asyncio.fixture
+async def redis_stream_session(docker_redis) -> AsyncGenerator[RedisStreamSession, None]:
+    """Provide a RedisStreamSession instance connected to test container."""
+    session = RedisStreamSession(
+        session_id="test_stream_session_123",
+        redis_url=docker_redis["url"],
+        db=docker_redis["db"],
+        session_prefix="test_agent_session",
+        messages_prefix="test_agent_messages"
+    )
+    
+    yield session
+    
+    # Cleanup
+    await session.clear_session()
+    await session.close()
+
+
+@pytest_asyncio.fixture(scope="session")
 async def redis_session_manager(docker_redis) -> AsyncGenerator[RedisSessionManager, None]:
-    """Provide a RedisSessionManager instance connected to test container."""
+    """Provide a RedisSessionManager shared by the whole test session.
+    
+    The database is flushed between tests by ``_flush_test_db``, so the
+    connection pool is built once instead of per test.
+    """
     manager = RedisSessionManager(
         redis_url=docker_redis["url"],
-        db=15,  # Use test database (integer, not string)
+        db=docker_redis["db"],
         session_prefix="test_agent_session",
         messages_prefix="test_agent_messages",
         default_ttl=3600,
-        max_connections=5
+        # Enough connections that the concurrency tests are not pool-bound
+        max_connections=max(10, 2 * (os.cpu_count() or 1))
     )
     
-    # Clean up any existing test data before yielding
-    client = redis.from_url(docker_redis["url"], db=15, decode_responses=True)
-    await client.flushdb()
-    await client.aclose()
-    
     yield manager
     
-    # Cleanup after test
     await manager.close()
-    
-    # Flush database after each test to ensure clean state
-    client = redis.from_url(docker_redis["url"], db=15, decode_responses=True)
-    await client.flushdb()
-    await client.aclose()
 
 
 # Alternative fixture for when Docker is not available
@@ -181,18 +334,24 @@ async def redis_client_local() -> AsyncGenerator[redis.Redis, None]:
     await client.aclose()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_items():
-    """Provide sample conversation items for testing."""
-    return [
+    """Provide sample conversation items for testing (shared, so returned as a tuple)."""
+    return (
         {"role": "user", "content": "Hello, how are you?"},
         {"role": "assistant", "content": "I'm doing well, thank you! How can I help you today?"},
         {"role": "user", "content": "Can you explain quantum computing?"},
         {"role": "assistant", "content": "Quantum computing uses quantum mechanics principles..."},
-    ]
+    )
+
+
+@pytest.fixture(scope="session")
+def sample_items_encoded(sample_items):
+    """Provide the sample items pre-encoded with the default JSON serializer."""
+    return tuple(orjson.dumps(item) for item in sample_items)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def single_item():
     """Provide a single conversation item for testing."""
     return {"role": "user", "content": "Test message"}
@@ -6,102 +6,139 @@ To use this instead of Docker:
 3. Make sure you have Redis running locally on port 6379
 
 Usage: mv conftest.py conftest_docker.py && mv conftest_local.py conftest.py
+
+The fixtures mirror conftest.py, so keep the two files in sync.
 """
 
-import asyncio
+import orjson
 import pytest
+import pytest_asyncio
+import redis as sync_redis
 import redis.asyncio as redis
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Generator
+
+from agents_redis.session import RedisSession, RedisSessionManager, RedisStreamSession
 
-from agents_redis.session import RedisSession, RedisSessionManager
+
+# Mock fixture that provides the same interface as docker_redis
+@pytest.fixture(scope="session")
+def docker_redis() -> dict:
+    """Mock fixture to provide same interface as Docker version for local Redis."""
+    client = sync_redis.from_url("redis://localhost:6379", db=15)
+    try:
+        client.ping()
+    except sync_redis.ConnectionError:
+        pytest.skip("Redis server not available on localhost:6379")
+    finally:
+        client.close()
+
+    return {
+        "url": "redis://localhost:6379",
+        "host": "localhost",
+        "port": 6379,
+        "db": 15,
+        "container_name": "localhost"
+    }
 
 
 @pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.new_event_loop()
-    yield loop
-    loop.close()
+def _flush_client(docker_redis) -> Generator[sync_redis.Redis, None, None]:
+    """Provide a sync Redis client used only to flush the test database between tests."""
+    client = sync_redis.from_url(docker_redis["url"], db=docker_redis["db"])
+    yield client
+    client.flushdb(asynchronous=True)
+    client.close()
+
+
+@pytest.fixture(autouse=True)
+def _flush_test_db(request) -> None:
+    """Flush the test database before every test that talks to Redis, as conftest.py does."""
+    if "docker_redis" in request.fixturenames and not request.node.get_closest_marker("shared_redis"):
+        request.getfixturevalue("_flush_client").flushdb(asynchronous=True)
 
 
-@pytest.fixture
-async def redis_client() -> AsyncGenerator[redis.Redis, None]:
+@pytest_asyncio.fixture
+async def redis_client(docker_redis) -> AsyncGenerator[redis.Redis, None]:
     """Provide a Redis client for testing against local Redis."""
-    client = redis.from_url("redis://localhost:6379", db=15, decode_responses=True)
-    
-    # Test Redis connection
-    try:
-        await client.ping()
-    except redis.ConnectionError:
-        pytest.skip("Redis server not available on localhost:6379")
-    
+    client = redis.from_url(docker_redis["url"], db=docker_redis["db"], decode_responses=True)
+
     yield client
-    
-    # Cleanup: flush the test database
-    await client.flushdb()
+
     await client.aclose()
 
 
-@pytest.fixture
-async def redis_session(redis_client: redis.Redis) -> AsyncGenerator[RedisSession, None]:
+@pytest_asyncio.fixture
+async def redis_session(docker_redis) -> AsyncGenerator[RedisSession, None]:
     """Provide a RedisSession instance for testing."""
     session = RedisSession(
         session_id="test_session_123",
-        redis_url="redis://localhost:6379",
-        db="default",  # Use test database
+        redis_url=docker_redis["url"],
+        db=docker_redis["db"],
         session_prefix="test_agent_session",
         messages_prefix="test_agent_messages"
     )
-    
+
     yield session
-    
+
     # Cleanup
     await session.clear_session()
     await session.close()
 
 
-@pytest.fixture
-async def redis_session_manager(redis_client: redis.Redis) -> AsyncGenerator[RedisSessionManager, None]:
+@pytest_asyncio.fixture
+async def redis_stream_session(docker_redis) -> AsyncGenerator[RedisStreamSession, None]:
+    """Provide a RedisStreamSession instance for testing."""
+    session = RedisStreamSession(
+        session_id="test_stream_session_123",
+        redis_url=docker_redis["url"],
+        db=docker_redis["db"],
+        session_prefix="test_agent_session",
+        messages_prefix="test_agent_messages"
+    )
+
+    yield session
+
+    # Cleanup
+    await session.clear_session()
+    await session.close()
+
+
+@pytest_asyncio.fixture
+async def redis_session_manager(docker_redis) -> AsyncGenerator[RedisSessionManager, None]:
     """Provide a RedisSessionManager instance for testing."""
     manager = RedisSessionManager(
-        redis_url="redis://localhost:6379",
-        db="default",  # Use test database
+        redis_url=docker_redis["url"],
+        db=docker_redis["db"],
         session_prefix="test_agent_session",
         messages_prefix="test_agent_messages",
         default_ttl=3600,
-        max_connections=5
+        max_connections=10
     )
-    
+
     yield manager
-    
+
     # Cleanup
     await manager.close()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_items():
-    """Provide sample conversation items for testing."""
-    return [
+    """Provide sample conversation items for testing (shared, so returned as a tuple)."""
+    return (
         {"role": "user", "content": "Hello, how are you?"},
         {"role": "assistant", "content": "I'm doing well, thank you! How can I help you today?"},
         {"role": "user", "content": "Can you explain quantum computing?"},
         {"role": "assistant", "content": "Quantum computing uses quantum mechanics principles..."},
-    ]
+    )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def sample_items_encoded(sample_items):
+    """Provide the sample items pre-encoded with the default JSON serializer."""
+    return tuple(orjson.dumps(item) for item in sample_items)
+
+
+@pytest.fixture(scope="session")
 def single_item():
     """Provide a single conversation item for testing."""
     return {"role": "user", "content": "Test message"}
-
-
-# Mock fixture that provides the same interface as docker_redis
-@pytest.fixture
-def docker_redis():
-    """Mock fixture to provide same interface as Docker version for local Redis."""
-    return {
-        "url": "redis://localhost:6379",
-        "host": "localhost", 
-        "port": 6379,
-        "container_name": "localhost"
-    }
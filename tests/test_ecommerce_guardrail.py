@@ -0,0 +1,91 @@
+"""Unit tests for the ecommerce example's cached input guardrail."""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from typing import AsyncGenerator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+import redis.asyncio as redis
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "examples"))
+# The example's LLM clients need the dev dependencies
+pytest.importorskip("httpx")
+
+from ecommerce import agent, cache  # noqa: E402
+
+
+HISTORY = [
+    {"role": "user", "content": "Where is my order?"},
+    {"role": "assistant", "content": "It ships tomorrow."},
+    {"role": "user", "content": "Can I return it?"},
+]
+
+
+@pytest_asyncio.fixture
+async def guardrail_cache(docker_redis) -> AsyncGenerator[redis.Redis, None]:
+    """Point the example's exact-match cache at the test database.
+
+    The guardrail agent is replaced too, since building it needs Azure credentials.
+    """
+    client = redis.from_url(docker_redis["url"], db=docker_redis["db"])
+    with patch.object(cache, "redis_client", client), patch.object(cache, "semantic_cache_enabled", False), \
+            patch.object(agent, "get_guardrail_agent", MagicMock()):
+        yield client
+    await client.aclose()
+
+
+def mock_runner(verdict: agent.EcommerceGuardrail) -> MagicMock:
+    """Provide a Runner whose guardrail agent always returns the given verdict."""
+    runner = MagicMock()
+    runner.run = AsyncMock(return_value=SimpleNamespace(final_output=verdict))
+    return runner
+
+
+class TestGuardrailCache:
+    """Test cases for the guardrail verdict caches."""
+
+    @pytest.mark.asyncio
+    async def test_list_input_is_keyed_by_last_user_message(self, guardrail_cache):
+        """Test that histories ending in the same user message share a verdict."""
+        verdict = agent.EcommerceGuardrail(is_ecommerce_related=True, reasoning="Returns")
+        runner = mock_runner(verdict)
+
+        with patch.object(agent, "Runner", runner):
+            first = await agent._guardrail_cached(HISTORY, context=None)
+            second = await agent._guardrail_cached(
+                [{"role": "user", "content": "Hi"}, HISTORY[-1]], context=None
+            )
+
+        assert first == second == verdict
+        runner.run.assert_awaited_once()
+        key = cache.cache_key(cache.GUARDRAIL_CACHE_PREFIX, "Can I return it?")
+        assert await guardrail_cache.exists(key) == 1
+
+    @pytest.mark.asyncio
+    async def test_semantic_tier_embeds_last_user_message(self, guardrail_cache):
+        """Test that list inputs reach the semantic tier with the latest user message."""
+        verdict = agent.EcommerceGuardrail(is_ecommerce_related=True, reasoning="Returns")
+        runner = mock_runner(verdict)
+        embed = AsyncMock(return_value=[0.0] * cache.SEMANTIC_DIM)
+        lookup = AsyncMock(return_value=verdict.model_dump_json())
+
+        with patch.object(agent, "Runner", runner), patch.object(cache, "semantic_cache_enabled", True), \
+                patch.object(cache, "embed", embed), patch.object(cache, "semantic_lookup", lookup):
+            result = await agent._guardrail_cached(HISTORY, context=None)
+
+        assert result == verdict
+        embed.assert_awaited_once_with("Can I return it?")
+        runner.run.assert_not_called()
+
+    def test_last_user_message(self):
+        """Test extracting the latest user message from the supported input shapes."""
+        assert cache.last_user_message("Hello") == "Hello"
+        assert cache.last_user_message(HISTORY) == "Can I return it?"
+        assert cache.last_user_message([
+            {"role": "user", "content": [{"type": "input_text", "text": "Track my parcel"}]},
+            {"role": "assistant", "content": "Sure."},
+        ]) == "Track my parcel"
+        assert cache.last_user_message([{"role": "assistant", "content": "Hi"}]) is None
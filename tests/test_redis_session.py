@@ -60,13 +60,25 @@ class TestRedisSession:
         assert client is client2
 
     @pytest.mark.asyncio
-    async def test_ensure_session_exists(self, redis_session, redis_client):
-        """Test ensuring session metadata exists."""
-        # Clear any existing session data
-        await redis_client.delete(redis_session.session_key)
+    async def test_injected_client(self, redis_client, single_item):
+        """Test that a client passed to the constructor is used instead of a new one."""
+        session = RedisSession("injected_test", client=redis_client)
         
-        # Ensure session exists
-        await redis_session._ensure_session_exists(redis_client)
+        assert await session._get_redis_client() is redis_client
+        
+        await session.add_items([single_item])
+        assert await redis_client.llen(session.messages_key) == 1
+
+        # The session doesn't own the client, so closing it leaves the client open
+        with patch.object(redis_client, "aclose", wraps=redis_client.aclose) as mock_aclose:
+            await session.close()
+        assert session._redis_client is redis_client
+        mock_aclose.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_add_items_creates_session_metadata(self, redis_session, redis_client, single_item):
+        """Test that the first write creates the session metadata."""
+        await redis_session.add_items([single_item])
         
         # Check session metadata was created
         session_data = await redis_client.hgetall(redis_session.session_key)
@@ -75,56 +87,48 @@ class TestRedisSession:
         assert "updated_at" in session_data
 
     @pytest.mark.asyncio
-    async def test_ensure_session_exists_with_ttl(self, redis_client):
-        """Test ensuring session exists with TTL."""
+    async def test_add_items_sets_ttl(self, docker_redis, redis_client):
+        """Test that writes apply the TTL to both session keys."""
         session = RedisSession(
             session_id="ttl_test",
-            redis_url="redis://localhost:6380",  # Use test Redis port
-            db=15,
+            redis_url=docker_redis["url"],
+            db=docker_redis["db"],
             session_prefix="test_agent_session",
             messages_prefix="test_agent_messages",
             ttl=60  # 1 minute TTL
         )
         
         try:
-            await session._ensure_session_exists(redis_client)
+            await session.add_items([{"role": "user", "content": "test"}])
             
-            # Check session TTL was set
             session_ttl = await redis_client.ttl(session.session_key)
             assert session_ttl > 0 and session_ttl <= 60
             
-            # Messages key might not exist yet, so TTL could be -2 (key doesn't exist)
             messages_ttl = await redis_client.ttl(session.messages_key)
-            # TTL should be either -2 (key doesn't exist) or positive (TTL set)
-            assert messages_ttl == -2 or (messages_ttl > 0 and messages_ttl <= 60)
-            
-            # Now add a message and check that TTL gets set on messages key
-            await session.add_items([{"role": "user", "content": "test"}])
-            messages_ttl_after_add = await redis_client.ttl(session.messages_key)
-            assert messages_ttl_after_add > 0 and messages_ttl_after_add <= 60
+            assert messages_ttl > 0 and messages_ttl <= 60
             
         finally:
             await session.close()
 
     @pytest.mark.asyncio
-    async def test_update_session_timestamp(self, redis_session, redis_client):
-        """Test updating session timestamp."""
-        # Create session first
-        await redis_session._ensure_session_exists(redis_client)
+    async def test_add_items_updates_timestamp(self, redis_session, redis_client, sample_items):
+        """Test that later writes update the session timestamp."""
+        await redis_session.add_items([sample_items[0]])
         
         # Get initial timestamp
         initial_data = await redis_client.hgetall(redis_session.session_key)
         initial_timestamp = float(initial_data["updated_at"])
         
-        # Wait a bit and update
+        # Wait a bit and write again
         await asyncio.sleep(0.01)  # Small delay
-        await redis_session._update_session_timestamp(redis_client)
+        await redis_session.add_items([sample_items[1]])
         
-        # Check timestamp was updated
+        # Check timestamp was updated and created_at was kept
         updated_data = await redis_client.hgetall(redis_session.session_key)
         updated_timestamp = float(updated_data["updated_at"])
         
         assert updated_timestamp > initial_timestamp
+        assert updated_data["created_at"] == initial_data["created_at"]
 
     @pytest.mark.asyncio
     async def test_add_items(self, redis_session, sample_items):
@@ -142,6 +146,45 @@ class TestRedisSession:
             item = json.loads(raw_item)
             assert item == sample_items[i]
 
+    @pytest.mark.asyncio
+    async def test_add_items_seeds_session_metadata(self, redis_session, redis_client, sample_items):
+        """Test that add_items creates metadata once and keeps created_at stable."""
+        await redis_session.add_items(sample_items[:1])
+
+        first_data = await redis_client.hgetall(redis_session.session_key)
+        assert first_data["session_id"] == redis_session.session_id
+        assert "created_at" in first_data
+        assert "updated_at" in first_data
+
+        await asyncio.sleep(0.01)
+        await redis_session.add_items(sample_items[1:])
+
+        second_data = await redis_client.hgetall(redis_session.session_key)
+        assert second_data["created_at"] == first_data["created_at"]
+        assert float(second_data["updated_at"]) > float(first_data["updated_at"])
+
+    @pytest.mark.asyncio
+    async def test_add_items_with_touch_interval(self, redis_session, redis_client, sample_items):
+        """Test that touch_interval debounces updated_at writes but still seeds new keys."""
+        redis_session.ttl = 60
+        redis_session.touch_interval = 3600
+
+        await redis_session.add_items(sample_items[:1])
+        first_data = await redis_client.hgetall(redis_session.session_key)
+        assert await redis_client.ttl(redis_session.messages_key) > 0
+
+        await asyncio.sleep(0.01)
+        await redis_session.add_items(sample_items[1:])
+        second_data = await redis_client.hgetall(redis_session.session_key)
+        assert second_data["updated_at"] == first_data["updated_at"]
+
+        # A list recreated after clearing still gets its metadata and TTL
+        await redis_session.clear_session()
+        await redis_session.add_items(sample_items[:1])
+        info = await redis_client.hgetall(redis_session.session_key)
+        assert info["session_id"] == redis_session.session_id
+        assert await redis_client.ttl(redis_session.messages_key) > 0
+
     @pytest.mark.asyncio
     async def test_add_empty_items(self, redis_session):
         """Test adding empty list of items."""
@@ -162,7 +205,7 @@ class TestRedisSession:
         retrieved_items = await redis_session.get_items()
         
         assert len(retrieved_items) == len(sample_items)
-        assert retrieved_items == sample_items
+        assert retrieved_items == list(sample_items)
 
     @pytest.mark.asyncio
     async def test_get_items_with_limit(self, redis_session, sample_items):
@@ -174,7 +217,7 @@ class TestRedisSession:
         retrieved_items = await redis_session.get_items(limit=2)
         
         assert len(retrieved_items) == 2
-        assert retrieved_items == sample_items[-2:]
+        assert retrieved_items == list(sample_items[-2:])
 
     @pytest.mark.asyncio
     async def test_get_items_empty_session(self, redis_session):
@@ -194,6 +237,88 @@ class TestRedisSession:
         assert len(items) == 1
         assert items[0] == {"valid": "json"}
 
+    @pytest.mark.asyncio
+    async def test_msgpack_serializer(self, docker_redis, sample_items):
+        """Test storing and reading items with the msgpack serializer."""
+        pytest.importorskip("msgpack")
+        session = RedisSession(
+            session_id="msgpack_test",
+            redis_url=docker_redis["url"],
+            db=docker_redis["db"],
+            session_prefix="test_agent_session",
+            messages_prefix="test_agent_messages",
+            serializer="msgpack",
+        )
+        
+        try:
+            await session.add_items(sample_items)
+            
+            assert await session.get_items() == list(sample_items)
+            assert await session.pop_item() == sample_items[-1]
+            
+            info = await session.get_session_info()
+            assert info["session_id"] == "msgpack_test"
+        finally:
+            await session.clear_session()
+            await session.close()
+
+    @pytest.mark.asyncio
+    async def test_compression(self, docker_redis, redis_session, sample_items):
+        """Test that large items are stored compressed and read back transparently."""
+        pytest.importorskip("zstandard")
+        large_item = {"role": "assistant", "content": "Quantum computing " * 100}
+        session = RedisSession(
+            session_id=redis_session.session_id,
+            redis_url=docker_redis["url"],
+            db=docker_redis["db"],
+            session_prefix="test_agent_session",
+            messages_prefix="test_agent_messages",
+            compress_threshold=256,
+        )
+        
+        try:
+            await session.add_items([sample_items[0], large_item])
+            
+            client = await session._get_redis_client()
+            small_raw, large_raw = await client.lrange(session.messages_key, 0, -1)
+            assert small_raw.startswith(b"{")
+            assert large_raw.startswith(b"\x28\xb5\x2f\xfd")
+            
+            # Sessions without a threshold still read compressed items
+            assert await redis_session.get_items() == [sample_items[0], large_item]
+            assert await redis_session.pop_item() == large_item
+        finally:
+            await session.close()
+
+    @pytest.mark.asyncio
+    async def test_corrupt_compressed_item(self, redis_session, redis_client, sample_items):
+        """Test that corrupt zstd frames are skipped like invalid JSON."""
+        pytest.importorskip("zstandard")
+        await redis_client.rpush(redis_session.messages_key, b"\x28\xb5\x2f\xfdgarbage")
+        await redis_session.add_items([sample_items[0]])
+        
+        assert await redis_session.get_items() == [sample_items[0]]
+        assert [item async for item in redis_session.iter_items()] == [sample_items[0]]
+        
+        assert await redis_session.pop_item() == sample_items[0]
+        assert await redis_session.pop_item() is None  # Corrupt entry, removed
+        assert await redis_session.get_session_size() == 0
+
+    @pytest.mark.asyncio
+    async def test_iter_items(self, redis_session, sample_items):
+        """Test iterating over items in chunks."""
+        await redis_session.add_items(sample_items)
+        
+        items = [item async for item in redis_session.iter_items(chunk_size=2)]
+        
+        assert items == list(sample_items)
+
+    @pytest.mark.asyncio
+    async def test_iter_items_empty(self, redis_session):
+        """Test iterating over an empty session."""
+        items = [item async for item in redis_session.iter_items()]
+        assert items == []
+
     @pytest.mark.asyncio
     async def test_pop_item(self, redis_session, sample_items):
         """Test popping the most recent item."""
@@ -208,13 +333,28 @@ class TestRedisSession:
         # Check item was removed
         remaining_items = await redis_session.get_items()
         assert len(remaining_items) == len(sample_items) - 1
-        assert remaining_items == sample_items[:-1]
+        assert remaining_items == list(sample_items[:-1])
+
+    @pytest.mark.asyncio
+    async def test_pop_items(self, redis_session, sample_items):
+        """Test popping several of the most recent items at once."""
+        await redis_session.add_items(sample_items)
+        
+        popped_items = await redis_session.pop_items(2)
+        
+        assert popped_items == [sample_items[-1], sample_items[-2]]
+        assert await redis_session.get_items() == list(sample_items[:-2])
+        assert await redis_session.pop_items(10) == list(reversed(sample_items[:-2]))
+        assert await redis_session.pop_items(10) == []
 
     @pytest.mark.asyncio
     async def test_pop_item_empty_session(self, redis_session):
         """Test popping from empty session."""
         popped_item = await redis_session.pop_item()
         assert popped_item is None
+        
+        # Nothing was popped, so no metadata is written
+        assert await redis_session.get_session_info() is None
 
     @pytest.mark.asyncio
     async def test_pop_item_invalid_json(self, redis_session, redis_client):
@@ -247,6 +387,24 @@ class TestRedisSession:
         assert not session_exists
         assert not messages_exists
 
+    @pytest.mark.asyncio
+    async def test_clear_session_without_unlink(self, redis_session, sample_items):
+        """Test clearing falls back to DEL only when the server lacks UNLINK."""
+        import redis.asyncio as redis
+        
+        await redis_session.add_items(sample_items)
+        client = await redis_session._get_redis_client()
+        
+        with patch.object(client, "unlink", AsyncMock(side_effect=redis.ResponseError("unknown command"))):
+            await redis_session.clear_session()
+        
+        assert not await client.exists(redis_session.session_key, redis_session.messages_key)
+        
+        # Other server errors are not hidden behind the fallback
+        with patch.object(client, "unlink", AsyncMock(side_effect=redis.ResponseError("READONLY replica"))):
+            with pytest.raises(redis.ResponseError, match="READONLY"):
+                await redis_session.clear_session()
+
     @pytest.mark.asyncio
     async def test_get_session_info(self, redis_session, sample_items):
         """Test getting session metadata."""
@@ -279,6 +437,42 @@ class TestRedisSession:
         size = await redis_session.get_session_size()
         assert size == len(sample_items)
 
+    @pytest.mark.asyncio
+    async def test_get_items_and_size(self, redis_session, sample_items):
+        """Test getting items and session size together."""
+        assert await redis_session.get_items_and_size() == ([], 0)
+        
+        await redis_session.add_items(sample_items)
+        
+        items, size = await redis_session.get_items_and_size()
+        assert items == list(sample_items)
+        assert size == len(sample_items)
+        
+        items, size = await redis_session.get_items_and_size(limit=2)
+        assert items == list(sample_items[-2:])
+        assert size == len(sample_items)
+
+    @pytest.mark.asyncio
+    async def test_add_items_raw(self, redis_session, sample_items, sample_items_encoded):
+        """Test adding pre-serialized items."""
+        await redis_session.add_items_raw(sample_items_encoded)
+        
+        assert await redis_session.get_items() == list(sample_items)
+        info = await redis_session.get_session_info()
+        assert info["session_id"] == redis_session.session_id
+
+    @pytest.mark.asyncio
+    async def test_get_session_info_and_size(self, redis_session, sample_items):
+        """Test getting session metadata and size together."""
+        assert await redis_session.get_session_info_and_size() == (None, 0)
+        
+        await redis_session.add_items(sample_items)
+        
+        info, size = await redis_session.get_session_info_and_size()
+        assert info == await redis_session.get_session_info()
+        assert info["session_id"] == redis_session.session_id
+        assert size == len(sample_items)
+
     @pytest.mark.asyncio
     async def test_close(self, redis_session):
         """Test closing Redis connection."""
@@ -293,7 +487,7 @@ class TestRedisSession:
     @pytest.mark.asyncio
     async def test_async_context_manager(self, docker_redis, sample_items):
         """Test using RedisSession as async context manager."""
-        async with RedisSession("context_test", redis_url=docker_redis["url"], db=15) as session:
+        async with RedisSession("context_test", redis_url=docker_redis["url"], db=docker_redis["db"]) as session:
             await session.add_items(sample_items)
             items = await session.get_items()
             assert len(items) == len(sample_items)
@@ -324,6 +518,60 @@ class TestRedisSession:
         assert set(json.dumps(item, sort_keys=True) for item in all_items) == \
                set(json.dumps(item, sort_keys=True) for item in sample_items)
 
+    @pytest.mark.asyncio
+    async def test_concurrent_add_items_are_coalesced(self, redis_session):
+        """Test that add_items calls arriving during a write share the next round trip."""
+        batches = [[{"role": "user", "content": f"batch {i} item {j}"} for j in range(3)] for i in range(5)]
+        
+        with patch.object(redis_session, "_write_items", wraps=redis_session._write_items) as write_items:
+            await asyncio.gather(*(redis_session.add_items(batch) for batch in batches))
+        
+        # The first call writes alone; the other four are flushed together
+        assert write_items.await_count == 2
+        assert await redis_session.get_items() == [item for batch in batches for item in batch]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_writer_releases_waiting_add_items(self, redis_session, sample_items):
+        """Test that cancelling the writer mid-flush never leaves other add_items calls hanging."""
+        import redis.asyncio as redis
+        
+        write_items = redis_session._write_items
+        first_write = asyncio.Event()
+        calls = []
+        
+        async def controlled_write_items(payloads):
+            calls.append(payloads)
+            if len(calls) == 1:
+                await first_write.wait()
+            elif len(calls) == 2:
+                await asyncio.Event().wait()  # Flushing the queued batch hangs until cancelled
+            await write_items(payloads)
+        
+        with patch.object(redis_session, "_write_items", side_effect=controlled_write_items):
+            writer = asyncio.create_task(redis_session.add_items([sample_items[0]]))
+            await asyncio.sleep(0)
+            in_flight = asyncio.create_task(redis_session.add_items([sample_items[1]]))
+            await asyncio.sleep(0)
+            
+            first_write.set()
+            while len(calls) < 2:
+                await asyncio.sleep(0.001)
+            queued = asyncio.create_task(redis_session.add_items([sample_items[2]]))
+            await asyncio.sleep(0)
+            
+            writer.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await writer
+            
+            # The batch being written when the writer was cancelled fails loudly
+            with pytest.raises(redis.ConnectionError, match="cancelled"):
+                await asyncio.wait_for(in_flight, timeout=1)
+            # The batch that was still queued is written by its own caller
+            await asyncio.wait_for(queued, timeout=1)
+        
+        assert await redis_session.get_items() == [sample_items[0], sample_items[2]]
+        assert redis_session._write_queue is None
+
 
 # Import asyncio for the timestamp test
 import asyncio
@@ -4,7 +4,7 @@ import pytest
 import asyncio
 from unittest.mock import patch
 
-from agents_redis.session import RedisSessionManager, RedisSession
+from agents_redis.session import RedisSessionManager, RedisSession, RedisStreamSession
 
 
 class TestRedisSessionManager:
@@ -66,6 +66,61 @@ class TestRedisSessionManager:
         
         assert session.ttl == 3600
 
+    def test_get_session_reuses_instance(self):
+        """Test that the same session ID and TTL map to one live session instance."""
+        manager = RedisSessionManager(default_ttl=3600)
+        session = manager.get_session("test_session")
+
+        assert manager.get_session("test_session") is session
+        assert manager.get_session("test_session", ttl=60) is not session
+        assert manager.get_session("other_session") is not session
+
+    @pytest.mark.asyncio
+    async def test_close_shared_session_keeps_client(self, redis_session_manager, single_item):
+        """Test that closing a shared session doesn't detach it from other holders."""
+        session = redis_session_manager.get_session("shared_close_test")
+        other_holder = redis_session_manager.get_session("shared_close_test")
+        
+        await session.close()
+        
+        assert await other_holder._get_redis_client() is redis_session_manager._client
+        assert other_holder._owns_client is False
+        await other_holder.add_items([single_item])
+        assert await other_holder.get_session_size() == 1
+
+    @pytest.mark.asyncio
+    async def test_get_stream_session(self, docker_redis, sample_items):
+        """Test that the manager can hand out stream-backed sessions."""
+        async with RedisSessionManager(
+            redis_url=docker_redis["url"],
+            db=docker_redis["db"],
+            session_class=RedisStreamSession,
+        ) as manager:
+            session = manager.get_session("stream_test")
+            assert isinstance(session, RedisStreamSession)
+
+            await session.add_items(sample_items)
+            assert await session.get_items(limit=2) == list(sample_items[-2:])
+            assert await manager.list_sessions() == ["stream_test"]
+            assert await manager.delete_session("stream_test") is True
+
+    @pytest.mark.asyncio
+    async def test_get_session_with_msgpack(self, docker_redis, sample_items):
+        """Test that the manager passes its serializer on to sessions."""
+        msgpack = pytest.importorskip("msgpack")
+        async with RedisSessionManager(
+            redis_url=docker_redis["url"],
+            db=docker_redis["db"],
+            serializer="msgpack",
+        ) as manager:
+            session = manager.get_session("msgpack_test")
+            assert session.serializer == "msgpack"
+
+            await session.add_items(sample_items)
+            raw_items = await manager._client.lrange(session.messages_key, 0, -1)
+            assert [msgpack.unpackb(raw) for raw in raw_items] == list(sample_items)
+            assert await session.get_items() == list(sample_items)
+
     @pytest.mark.asyncio
     async def test_multiple_sessions_share_pool(self, redis_session_manager):
         """Test that multiple sessions share the connection pool."""
@@ -78,6 +133,8 @@ class TestRedisSessionManager:
         # They should use the same connection pool
         assert client1.connection_pool is client2.connection_pool
         assert client1.connection_pool is redis_session_manager._redis_pool
+        assert redis_session_manager.connection_pool is redis_session_manager._redis_pool
+        assert client1 is client2 is redis_session_manager._client
 
     @pytest.mark.asyncio
     async def test_list_sessions_empty(self, redis_session_manager):
@@ -137,6 +194,22 @@ class TestRedisSessionManager:
             await user_session1.close()
             await user_session2.close()
 
+    @pytest.mark.asyncio
+    async def test_list_sessions_across_scan_batches(self, redis_session_manager, sample_items):
+        """Test listing sessions when SCAN needs several calls to cover the keyspace."""
+        sessions = [redis_session_manager.get_session(f"scan_{i}") for i in range(25)]
+
+        try:
+            for session in sessions:
+                await session.add_items([sample_items[0]])
+
+            listed = await redis_session_manager.list_sessions("scan_*", count=2)
+
+            assert sorted(listed) == sorted(f"scan_{i}" for i in range(25))
+        finally:
+            for session in sessions:
+                await session.close()
+
     @pytest.mark.asyncio
     async def test_delete_session_exists(self, redis_session_manager, sample_items):
         """Test deleting an existing session."""
@@ -184,7 +257,7 @@ class TestRedisSessionManager:
     @pytest.mark.asyncio
     async def test_async_context_manager(self, docker_redis, sample_items):
         """Test using RedisSessionManager as async context manager."""
-        async with RedisSessionManager(redis_url=docker_redis["url"], db=15) as manager:
+        async with RedisSessionManager(redis_url=docker_redis["url"], db=docker_redis["db"]) as manager:
             session = manager.get_session("context_test")
             await session.add_items(sample_items)
             
@@ -239,7 +312,7 @@ class TestRedisSessionManager:
             assert len(items1) == 1
             assert len(items2) == 2
             assert items1[0] == sample_items[0]
-            assert items2 == sample_items[1:3]
+            assert items2 == list(sample_items[1:3])
         finally:
             await session1.close()
             await session2.close()
@@ -247,9 +320,9 @@ class TestRedisSessionManager:
     @pytest.mark.asyncio
     async def test_error_handling_in_list_sessions(self, redis_session_manager):
         """Test error handling in list_sessions method."""
-        with patch.object(redis_session_manager._redis_pool, 'get_connection') as mock_get_conn:
+        with patch.object(redis_session_manager._client, 'scan_iter') as mock_scan_iter:
             # Mock a connection error
-            mock_get_conn.side_effect = Exception("Connection failed")
+            mock_scan_iter.side_effect = Exception("Connection failed")
             
             with pytest.raises(Exception, match="Connection failed"):
                 await redis_session_manager.list_sessions()
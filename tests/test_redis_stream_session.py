@@ -0,0 +1,123 @@
+"""Unit tests for RedisStreamSession class."""
+
+import pytest
+
+from agents_redis.session import RedisStreamSession
+
+
+class TestRedisStreamSession:
+    """Test cases for RedisStreamSession class."""
+
+    def test_init(self):
+        """Test RedisStreamSession initialization."""
+        session = RedisStreamSession("test_123", ttl=3600, max_items=100)
+        
+        assert session.session_id == "test_123"
+        assert session.ttl == 3600
+        assert session.max_items == 100
+        assert session.messages_key == "agent_messages:test_123"
+
+    @pytest.mark.asyncio
+    async def test_add_and_get_items(self, redis_stream_session, redis_client, sample_items):
+        """Test adding items stores them as stream entries."""
+        await redis_stream_session.add_items(sample_items)
+        
+        assert await redis_client.type(redis_stream_session.messages_key) == "stream"
+        assert await redis_stream_session.get_items() == list(sample_items)
+        assert await redis_stream_session.get_session_size() == len(sample_items)
+        
+        session_data = await redis_client.hgetall(redis_stream_session.session_key)
+        assert session_data["session_id"] == redis_stream_session.session_id
+
+    @pytest.mark.asyncio
+    async def test_get_items_with_limit(self, redis_stream_session, sample_items):
+        """Test getting the latest N items in chronological order."""
+        await redis_stream_session.add_items(sample_items)
+        
+        items = await redis_stream_session.get_items(limit=2)
+        
+        assert items == list(sample_items[-2:])
+
+    @pytest.mark.asyncio
+    async def test_get_items_and_size(self, redis_stream_session, sample_items):
+        """Test getting items and session size together."""
+        await redis_stream_session.add_items(sample_items)
+        
+        assert await redis_stream_session.get_items_and_size() == (list(sample_items), len(sample_items))
+        assert await redis_stream_session.get_items_and_size(limit=2) == (
+            list(sample_items[-2:]), len(sample_items)
+        )
+
+    @pytest.mark.asyncio
+    async def test_add_items_raw(self, redis_stream_session, sample_items, sample_items_encoded):
+        """Test adding pre-serialized items."""
+        await redis_stream_session.add_items_raw(sample_items_encoded)
+        
+        assert await redis_stream_session.get_items() == list(sample_items)
+
+    @pytest.mark.asyncio
+    async def test_get_session_info_and_size(self, redis_stream_session, sample_items):
+        """Test getting session metadata and size together."""
+        await redis_stream_session.add_items(sample_items)
+        
+        info, size = await redis_stream_session.get_session_info_and_size()
+        assert info["session_id"] == redis_stream_session.session_id
+        assert size == len(sample_items)
+
+    @pytest.mark.asyncio
+    async def test_get_entries_since(self, redis_stream_session, sample_items):
+        """Test incremental reads after a stream entry ID."""
+        await redis_stream_session.add_items(sample_items[:2])
+        
+        entries = await redis_stream_session.get_entries_since()
+        assert [item for _, item in entries] == list(sample_items[:2])
+        
+        last_id = entries[-1][0]
+        await redis_stream_session.add_items(sample_items[2:])
+        
+        new_entries = await redis_stream_session.get_entries_since(last_id)
+        assert [item for _, item in new_entries] == list(sample_items[2:])
+
+    @pytest.mark.asyncio
+    async def test_iter_items(self, redis_stream_session, sample_items):
+        """Test iterating over stream entries in chunks."""
+        await redis_stream_session.add_items(sample_items)
+        
+        items = [item async for item in redis_stream_session.iter_items(chunk_size=3)]
+        
+        assert items == list(sample_items)
+
+    @pytest.mark.asyncio
+    async def test_pop_item(self, redis_stream_session, sample_items):
+        """Test popping the most recent item."""
+        await redis_stream_session.add_items(sample_items)
+        
+        popped = await redis_stream_session.pop_item()
+        
+        assert popped == sample_items[-1]
+        assert await redis_stream_session.get_items() == list(sample_items[:-1])
+
+    @pytest.mark.asyncio
+    async def test_pop_items(self, redis_stream_session, sample_items):
+        """Test popping several of the most recent items at once."""
+        await redis_stream_session.add_items(sample_items)
+        
+        popped = await redis_stream_session.pop_items(3)
+        
+        assert popped == list(reversed(sample_items[-3:]))
+        assert await redis_stream_session.get_items() == list(sample_items[:1])
+        assert await redis_stream_session.get_session_size() == 1
+
+    @pytest.mark.asyncio
+    async def test_pop_item_empty(self, redis_stream_session):
+        """Test popping from an empty session."""
+        assert await redis_stream_session.pop_item() is None
+
+    @pytest.mark.asyncio
+    async def test_clear_session(self, redis_stream_session, sample_items):
+        """Test clearing a stream session."""
+        await redis_stream_session.add_items(sample_items)
+        await redis_stream_session.clear_session()
+        
+        assert await redis_stream_session.get_items() == []
+        assert await redis_stream_session.get_session_info() is None
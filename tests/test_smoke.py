@@ -8,7 +8,7 @@ from agents_redis.session import RedisSession, RedisSessionManager
 @pytest.mark.asyncio
 async def test_redis_connection(docker_redis):
     """Test that we can connect to Redis."""
-    client = redis.from_url(docker_redis["url"], db=15)
+    client = redis.from_url(docker_redis["url"], db=docker_redis["db"])
     pong = await client.ping()
     assert pong is True
     await client.aclose()
@@ -16,14 +16,14 @@ async def test_redis_connection(docker_redis):
 @pytest.mark.asyncio
 async def test_session_creation(docker_redis):
     """Test that we can create a session."""
-    session = RedisSession("smoke_test", redis_url=docker_redis["url"], db=15)
+    session = RedisSession("smoke_test", redis_url=docker_redis["url"], db=docker_redis["db"])
     assert session.session_id == "smoke_test"
     await session.close()
 
 @pytest.mark.asyncio
 async def test_manager_creation(docker_redis):
     """Test that we can create a session manager."""
-    manager = RedisSessionManager(redis_url=docker_redis["url"], db=15)
+    manager = RedisSessionManager(redis_url=docker_redis["url"], db=docker_redis["db"])
     session = manager.get_session("smoke_test")
     assert session.session_id == "smoke_test"
     await session.close()
@@ -32,7 +32,7 @@ async def test_manager_creation(docker_redis):
 @pytest.mark.asyncio
 async def test_basic_workflow(docker_redis):
     """Test basic add/get workflow."""
-    session = RedisSession("workflow_test", redis_url=docker_redis["url"], db=15)
+    session = RedisSession("workflow_test", redis_url=docker_redis["url"], db=docker_redis["db"])
     
     try:
         # Add an item
@@ -0,0 +1,240 @@
+"""Unit tests for UnifiedSessionManager class."""
+
+import asyncio
+import logging
+import pytest
+import pytest_asyncio
+import redis.asyncio as redis
+from unittest.mock import patch
+
+from agents_redis import AgentMemoryContext, UnifiedSessionManager
+from agents_redis._utils import ZSTD_MAGIC
+from agents_redis.context import DistributedContextManager
+
+
+@pytest_asyncio.fixture
+async def unified_manager(docker_redis):
+    """Provide a UnifiedSessionManager connected to the test database."""
+    manager = UnifiedSessionManager(redis_url=docker_redis["url"], db=docker_redis["db"])
+    yield manager
+    await manager.close()
+
+
+class TestUnifiedSessionManager:
+    """Test cases for UnifiedSessionManager class."""
+
+    @pytest.mark.asyncio
+    async def test_init(self, unified_manager):
+        """Test that the context manager shares the session manager's client."""
+        assert unified_manager.context_manager.context_class is AgentMemoryContext
+        assert unified_manager.context_manager.redis is unified_manager.session_manager._client
+
+    @pytest.mark.asyncio
+    async def test_get_or_create_context(self, unified_manager):
+        """Test creating a context and reading it back."""
+        context = await unified_manager.get_or_create_context("context_test", "user_1", name="Ada")
+        assert context.user_id == "user_1"
+        assert context.name == "Ada"
+
+        context.increment_interactions()
+        await unified_manager.save_context("context_test", context)
+
+        stored = await unified_manager.get_or_create_context("context_test", "user_1")
+        assert stored.total_interactions == 1
+
+    @pytest.mark.asyncio
+    async def test_get_or_create_context_hit_skips_serialization(self, unified_manager):
+        """Test that an existing context is returned without serializing the default."""
+        await unified_manager.get_or_create_context("lazy_test", "user_1")
+        
+        context_manager = unified_manager.context_manager
+        with patch.object(
+            context_manager, "_serialize_context", wraps=context_manager._serialize_context
+        ) as mock_serialize:
+            context = await unified_manager.get_or_create_context("lazy_test", "user_1")
+        
+        assert context.user_id == "user_1"
+        mock_serialize.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_or_create_context_script_errors_propagate(self, unified_manager):
+        """Test that only unavailable scripting triggers the non-script fallback."""
+        context_manager = unified_manager.context_manager
+        
+        with patch.object(
+            context_manager, "_get_or_set_script", side_effect=redis.ResponseError("OOM command not allowed")
+        ):
+            with pytest.raises(redis.ResponseError, match="OOM"):
+                await unified_manager.get_or_create_context("error_test", "user_1")
+        
+        with patch.object(
+            context_manager, "_get_or_set_script", side_effect=redis.ResponseError("unknown command 'evalsha'")
+        ):
+            context = await unified_manager.get_or_create_context("error_test", "user_1")
+        
+        assert context.user_id == "user_1"
+        assert await context_manager.get_context("error_test") == context
+
+    @pytest.mark.asyncio
+    async def test_get_contexts(self, unified_manager):
+        """Test batched reads across MGET batches with missing and invalid entries."""
+        context_manager = unified_manager.context_manager
+        for session_id in ("first", "second", "third"):
+            context = AgentMemoryContext(user_id="user_1", session_id=session_id, name=session_id)
+            await unified_manager.save_context(session_id, context)
+        await context_manager.redis.set("agent_context:invalid", b"not a context")
+
+        contexts = await context_manager.get_contexts(
+            ["first", "missing", "second", "invalid", "third"], batch_size=2
+        )
+
+        assert list(contexts) == ["first", "missing", "second", "invalid", "third"]
+        assert contexts["first"].name == "first"
+        assert contexts["second"].name == "second"
+        assert contexts["third"].name == "third"
+        assert contexts["missing"] is None
+        assert contexts["invalid"] is None
+
+    @pytest.mark.asyncio
+    async def test_list_all_sessions(self, unified_manager, single_item):
+        """Test that sessions with messages and contexts are each counted once."""
+        await unified_manager.get_redis_session("both").add_items([single_item])
+        await unified_manager.get_redis_session("messages_only").add_items([single_item])
+        await unified_manager.get_or_create_context("both", "user_1")
+        await unified_manager.get_or_create_context("context_only", "user_2")
+
+        overview = await unified_manager.list_all_sessions()
+
+        assert overview["total_sessions"] == 3
+        assert overview["sessions_with_messages"] == 2
+        assert overview["sessions_with_contexts"] == 2
+        assert sorted(overview["session_ids"]) == ["both", "context_only", "messages_only"]
+
+    @pytest.mark.asyncio
+    async def test_delete_session_completely(self, unified_manager, single_item):
+        """Test deleting both the messages and the context of a session."""
+        await unified_manager.get_redis_session("delete_test").add_items([single_item])
+        await unified_manager.get_or_create_context("delete_test", "user_1")
+
+        result = await unified_manager.delete_session_completely("delete_test")
+        assert result == {"messages_deleted": True, "context_deleted": True}
+
+        overview = await unified_manager.get_session_overview("delete_test")
+        assert overview["has_messages"] is False
+        assert overview["has_context"] is False
+
+        result = await unified_manager.delete_session_completely("delete_test")
+        assert result == {"messages_deleted": False, "context_deleted": False}
+
+    @pytest.mark.asyncio
+    async def test_context_writes_keep_their_order(self, unified_manager):
+        """Test that a foreground save is not overwritten by an earlier background save."""
+        context_manager = unified_manager.context_manager
+        context = AgentMemoryContext(user_id="user_1", session_id="order_test", name="Ada")
+        setex = context_manager.redis.setex
+        
+        async def slow_first_setex(*args, **kwargs):
+            if slow_first_setex.calls == 0:
+                await asyncio.sleep(0.05)
+            slow_first_setex.calls += 1
+            return await setex(*args, **kwargs)
+        slow_first_setex.calls = 0
+        
+        with patch.object(context_manager.redis, "setex", side_effect=slow_first_setex):
+            await unified_manager.save_context("order_test", context, background=True)
+            newer = context.model_copy(update={"total_interactions": 1})
+            await unified_manager.save_context("order_test", newer)
+            await context_manager.flush_pending_writes()
+        
+        stored = await context_manager.get_context("order_test")
+        assert stored.total_interactions == 1
+
+    @pytest.mark.asyncio
+    async def test_background_write_waits_for_foreground_write(self, unified_manager):
+        """Test that a background save issued during a foreground save lands after it."""
+        context_manager = unified_manager.context_manager
+        context = AgentMemoryContext(user_id="user_1", session_id="order_test", name="Ada")
+        setex = context_manager.redis.setex
+
+        async def slow_first_setex(*args, **kwargs):
+            slow_first_setex.calls += 1
+            if slow_first_setex.calls == 1:
+                await asyncio.sleep(0.05)
+            return await setex(*args, **kwargs)
+        slow_first_setex.calls = 0
+
+        with patch.object(context_manager.redis, "setex", side_effect=slow_first_setex):
+            foreground = asyncio.create_task(unified_manager.save_context("order_test", context))
+            await asyncio.sleep(0)
+            newer = context.model_copy(update={"total_interactions": 1})
+            await unified_manager.save_context("order_test", newer, background=True)
+            await foreground
+            await context_manager.flush_pending_writes()
+
+        stored = await context_manager.get_context("order_test")
+        assert stored.total_interactions == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_background_write_is_logged(self, unified_manager, caplog):
+        """Test that a background write failure is logged instead of dropped."""
+        context_manager = unified_manager.context_manager
+        context = AgentMemoryContext(user_id="user_1", session_id="failed_test", name="Ada")
+        
+        with patch.object(
+            context_manager.redis, "setex", side_effect=redis.ConnectionError("Connection lost")
+        ), caplog.at_level(logging.ERROR, logger="agents_redis.context"):
+            await unified_manager.save_context("failed_test", context, background=True)
+            await context_manager.flush_pending_writes()
+        
+        assert "Background context write to agent_context:failed_test failed" in caplog.text
+        assert context_manager._pending_writes == {}
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_background_writes(self, docker_redis, redis_client):
+        """Test that close waits for background context writes."""
+        manager = UnifiedSessionManager(redis_url=docker_redis["url"], db=docker_redis["db"])
+        context = AgentMemoryContext(user_id="user_1", session_id="close_test", name="Ada")
+
+        await manager.save_context("close_test", context, background=True)
+        await manager.close()
+
+        assert await redis_client.exists("agent_context:close_test") == 1
+
+
+class TestContextCompression:
+    """Test zstd compression of stored contexts."""
+
+    async def _round_trip(self, client, serializer):
+        """Store a small and a large context compressed, then read both back."""
+        writer = DistributedContextManager(
+            client, AgentMemoryContext, serializer=serializer, compress_threshold=512
+        )
+        # A manager built without the option still reads compressed payloads
+        plain_reader = DistributedContextManager(client, AgentMemoryContext, serializer=serializer)
+        small = AgentMemoryContext(user_id="user_1", session_id="small", name="Ada")
+        large = AgentMemoryContext(
+            user_id="user_1", session_id="large", name="Ada", conversation_summary="x" * 4096
+        )
+
+        await writer.store_context("small", small)
+        await writer.store_context("large", large)
+
+        assert not (await client.get("agent_context:small")).startswith(ZSTD_MAGIC)
+        large_raw = await client.get("agent_context:large")
+        assert large_raw.startswith(ZSTD_MAGIC)
+        assert len(large_raw) < 512
+
+        for reader in (writer, plain_reader):
+            assert await reader.get_context("small") == small
+            assert await reader.get_context("large") == large
+        assert await plain_reader.get_contexts(["small", "large"]) == {"small": small, "large": large}
+
+    @pytest.mark.asyncio
+    async def test_json_round_trip(self, unified_manager):
+        """Test compressed and uncompressed JSON contexts."""
+        await self._round_trip(unified_manager.context_manager.redis, "json")
+
+    @pytest.mark.asyncio
+    async def test_msgpack_round_trip(self, unified_manager):
+        """Test compressed and uncompressed MessagePack contexts."""
+        await self._round_trip(unified_manager.context_manager.redis, "msgpack")